@@ -6,6 +6,8 @@ import asyncio
 import logging
 import json
 from datetime import datetime
+from resilience import CircuitOpenError, get_breaker_statuses
+from riot_api import riot_client
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,7 +23,16 @@ load_dotenv()
 token = os.getenv("BOT_TOKEN")
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='!',intents=intents)
+
+
+class MarbleBot(commands.Bot):
+    async def close(self):
+        """Unloads every cog, then closes the Riot API pools they all share."""
+        await super().close()
+        await riot_client.close()
+
+
+bot = MarbleBot(command_prefix='!',intents=intents)
 
 async def load_cogs():
     
@@ -76,6 +87,9 @@ async def on_command_error(ctx, error):
     elif isinstance(error, commands.MissingPermissions):
         await ctx.send(f"❌ You don't have permission to use this command.")
         logger.warning(f"Permission denied for {ctx.author} in {ctx.command}")
+    elif isinstance(getattr(error, "original", None), CircuitOpenError):
+        await ctx.send(f"⚠️ An upstream API is having trouble: {error.original}. Try again later.")
+        logger.warning(f"Upstream unavailable in {ctx.command}: {error.original}")
     else:
         await ctx.send(f"❌ An error occurred while executing the command.")
         logger.error(f"Error in command {ctx.command}: {error}", exc_info=True)
@@ -91,6 +105,33 @@ async def hi(ctx):
         await ctx.send("❌ An error occurred.")
 
 
+@bot.command(aliases=["breakers"], hidden=True)
+@commands.is_owner()
+async def upstreams(ctx):
+    """
+    Shows the circuit breaker state of every upstream API host. Owner only.
+    Usage: !upstreams
+    """
+    statuses = get_breaker_statuses()
+    if not statuses:
+        await ctx.send("No upstream API has been called yet.")
+        return
+    state_emojis = {"closed": "🟢", "half-open": "🟡", "open": "🔴"}
+    message = "**Upstream APIs**\n"
+    for host, status in statuses.items():
+        message += (
+            f"{state_emojis[status['state']]} `{host}` : **{status['state']}**, "
+            f"{status['failures']} failures in a row, opened {status['times_opened']} times, "
+            f"{status['rejected']} calls failed fast"
+        )
+        if status["state"] == "open":
+            message += f", retrying in {status['retry_in']:.0f}s"
+        if status["last_error"] and status["state"] != "closed":
+            message += f"\n  last error: `{status['last_error']}`"
+        message += "\n"
+    await ctx.send(message)
+
+
 @bot.command(aliases=['updates', 'changes', 'whatsnew'])
 async def changelog(ctx, size: str = "minor"):
     """View the changelog for Marble bot updates!
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+import math
+import os
+from config import DEFAULT_PLATFORM, MATCH_FETCH_WINDOW, RIOT_AVERAGE_LATENCY
+from match_history import MATCH_ID_PAGE_SIZE, match_history
+from match_store import match_store
+from riot_api import riot_client
+from riot_routing import get_account_region, get_host, get_region, guess_platform
+logger = logging.getLogger('discord.budget_estimator')
+
+# Loss ratio assumed for a queue nothing was recorded for yet.
+DEFAULT_LOSS_RATIO = 0.5
+# Matches looked at per player by !ranked_report.
+RANKED_REPORT_MATCHES = 5
+
+
+class BudgetEstimator:
+    """
+    Predicts how many Riot calls a command will make, and how long they will take, before running it.
+
+    Estimates combine what is already stored locally (match histories and matches), the
+    current headroom of the rate limiter of every Riot host involved, and the share of fetched
+    matches that turned out to be losses in past `!blame` runs, per queue (kept in `filepath`).
+    """
+    def __init__(self, filepath: str = 'data/queueStats.json'):
+        self.filepath = filepath
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        self.queue_stats = self._load_db()
+        self._file_lock = asyncio.Lock()
+
+    def _load_db(self):
+        """Internal helper to load data from disk safely."""
+        try:
+            with open(self.filepath, 'r', encoding="utf8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_db(self, data) -> None:
+        temp_path = f"{self.filepath}.tmp"
+        with open(temp_path, 'w', encoding="utf8") as f:
+            json.dump(data, f, indent=4)
+        os.replace(temp_path, self.filepath)
+
+    async def _save_db(self) -> None:
+        snapshot = json.loads(json.dumps(self.queue_stats))
+        async with self._file_lock:
+            await asyncio.to_thread(self._write_db, snapshot)
+
+    @staticmethod
+    def _queue_key(queue_id) -> str:
+        return str(queue_id) if queue_id else "all"
+
+    @staticmethod
+    def is_stored(match_id: str) -> bool:
+        return match_id in riot_client.match_records or match_id in match_store
+
+    async def record_outcome(self, queue_id, fetched: int, losses: int) -> None:
+        """Records how many of the matches fetched by a `!blame` run were losses."""
+        if not fetched:
+            return
+        stats = self.queue_stats.setdefault(self._queue_key(queue_id), {"matches": 0, "losses": 0})
+        stats["matches"] += fetched
+        stats["losses"] += losses
+        await self._save_db()
+
+    def loss_ratio(self, queue_id) -> float:
+        """Share of fetched matches that were losses in past runs for a queue, smoothed toward 50%."""
+        stats = self.queue_stats.get(self._queue_key(queue_id))
+        if not stats:
+            return DEFAULT_LOSS_RATIO
+        return (stats["losses"] + 1) / (stats["matches"] + 2)
+
+    def estimate_seconds(self, calls: int, host: str = None) -> float:
+        """
+        Wall-clock seconds for `calls` Riot calls to one host: rate limit waits plus request latency.
+        The host defaults to the region of the default platform.
+        """
+        if not calls:
+            return 0.0
+        host = host or get_host(get_region(DEFAULT_PLATFORM))
+        latency = math.ceil(calls / MATCH_FETCH_WINDOW) * RIOT_AVERAGE_LATENCY
+        return riot_client.get_rate_limiter(host).estimate_wait(calls) + latency
+
+    def estimate_blame(self, puuid: str, count: int, queue_id=None):
+        """
+        Predicts the cost of finding a player's last `count` losses.
+
+        Returns:
+            dict: {
+                "matches": matches expected to be scanned,
+                "calls": Riot calls expected,
+                "hit_rate": share of the scanned matches already stored locally,
+                "seconds": expected wall-clock time
+            }
+        """
+        loss_ratio = self.loss_ratio(queue_id)
+        matches = math.ceil(count / loss_ratio)
+        known_ids = match_history.get_ids(puuid, queue_id)[:matches]
+        stored = sum(1 for match_id in known_ids if self.is_stored(match_id))
+        unknown = matches - len(known_ids)
+        # One sync call, plus a page of IDs for every page the history is missing.
+        list_calls = 1 + math.ceil(unknown / MATCH_ID_PAGE_SIZE)
+        calls = (matches - stored) + list_calls
+        return {
+            "matches": matches,
+            "calls": calls,
+            "hit_rate": stored / matches if matches else 0.0,
+            "seconds": self.estimate_seconds(calls, get_host(get_region(riot_client.get_platform(puuid))))
+        }
+
+    def max_blame_count(self, puuid: str, count: int, queue_id, max_seconds: float) -> int:
+        """Largest number of losses (at most `count`, at least 1) expected to be found within `max_seconds`."""
+        low, high = 1, count
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.estimate_blame(puuid, middle, queue_id)["seconds"] <= max_seconds:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def estimate_ranked_report(self, players):
+        """
+        Predicts the cost of compiling the ranked data of every registered player.
+        Hosts are queried in parallel, so the slowest host sets the expected time.
+
+        Args:
+            players: dict of registered players, as stored in players.json
+
+        Returns:
+            dict: {"calls": Riot calls expected, "seconds": expected wall-clock time}
+        """
+        host_calls = {}
+        for player in players.values():
+            puuid = player.get("riot_id")
+            platform = player.get("platform") or riot_client.get_platform(puuid)
+            region_host = get_host(get_region(platform))
+            if f"{player['riot_name'].lower()}#{player['riot_tag'].lower()}" not in riot_client.puuid_cache:
+                account_host = get_host(get_account_region(guess_platform(player['riot_tag'])))
+                host_calls[account_host] = host_calls.get(account_host, 0) + 1
+            # Ranked entries on the platform host, a match history sync and the missing matches on the regional one.
+            host_calls[get_host(platform)] = host_calls.get(get_host(platform), 0) + 1
+            match_ids = match_history.get_ids(puuid, 420)[:RANKED_REPORT_MATCHES] if puuid else []
+            missing = RANKED_REPORT_MATCHES - sum(1 for match_id in match_ids if self.is_stored(match_id))
+            host_calls[region_host] = host_calls.get(region_host, 0) + 1 + missing
+        seconds = max((self.estimate_seconds(calls, host) for host, calls in host_calls.items()), default=0.0)
+        return {"calls": sum(host_calls.values()), "seconds": seconds}
+
+
+budget_estimator = BudgetEstimator()
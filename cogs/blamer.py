@@ -1,13 +1,22 @@
 import discord
 from discord.ext import commands
-import json
+import asyncio
+import contextlib
 import logging
+import time
 from dotenv import load_dotenv
 import os
-import requests
-from match_score_calculator import calculate_int_scores
-from helpers import convert_queue_aliases_to_queue
-from helpers import get_loses_data_list, get_match_int_scores_list
+from match_score_calculator import INT_METRICS
+from int_score_cache import int_score_cache
+from match_records import as_match_record
+from helpers import convert_queue_aliases_to_queue, convert_queue_type_to_id
+from helpers import iter_loses_data, get_match_int_scores_list
+from config import BLAME_PROGRESS_EDIT_INTERVAL, BLAME_BACKGROUND_AFTER_SECONDS, BLAME_MAX_SECONDS
+from config import MASS_REGISTER_EDIT_INTERVAL, MASS_REGISTER_PROGRESS_LINES
+from budget_estimator import budget_estimator
+from riot_api import riot_client
+from riot_routing import get_region
+from player_registry import player_registry, RegistrationError
 load_dotenv()
 riot_token = os.getenv("RIOT_KEY")
 
@@ -17,27 +26,32 @@ riot_token = os.getenv("RIOT_KEY")
 
 logger = logging.getLogger('discord.blamer')
 
+BLAME_THRESHOLDS = [
+    (70, "💀", "Yeah, it was definitely your fault.", "You were the main problem in these losses."),
+    (60, "💧", "Mostly your fault.", "You contributed significantly to these losses."),
+    (50, "😐", "About equal blame.", "You and your teammates share the responsibility."),
+    (25, "😅", "Your team lost you your games.", "Your team held you back more than you held them back."),
+    (0, "🙏", "Team gap.", "These losses were NOT on you.")
+]
+
+METRIC_NAMES = {
+    "kda": "KDA",
+    "vision": "Vision",
+    "gold": "Gold",
+    "damage": "Damage",
+    "kill_participation": "Kill Participation"
+}
+
     
 def get_player_pool():
     """
-    Gets the pool of players registered with the !register commands, from the players.json file.
+    Gets the pool of players registered with the !register commands, from the player registry.
     Returns:
-        A dict of players, of type `discord_name = {"riot_name": riot_name,"riot_tag": "EUNE","riot_id": id}`
+        A dict of players, of type `discord_name = {"riot_name": riot_name,"riot_tag": "EUNE","riot_id": id,"platform": "eun1","region": "europe"}`
     """
-    filepath = "data/players.json"
-    if not os.path.exists(filepath):
-        with open(filepath,"w",encoding="utf8") as file:
-            json.dump({}, file)
-        logger.warning("Created missing players.json file")
-    
-    try:
-        with open("data/players.json", "r" ,encoding="utf8") as file:
-            players = json.load(file)
-        logger.debug(f"Loaded {len(players)} players from pool")
-        return players
-    except Exception as e:
-        logger.error(f"Error loading player pool: {e}")
-        return {}
+    players = player_registry.get_all()
+    logger.debug(f"Loaded {len(players)} players from pool")
+    return players
 
 def get_player_pool_names():
     """
@@ -45,10 +59,7 @@ def get_player_pool_names():
     Returns:
         List of names.
     """
-    pool = get_player_pool()
-    names = []
-    for player in pool:
-        names.append(pool[player]["riot_name"])
+    names = player_registry.get_riot_names()
     logger.debug(f"Retrieved {len(names)} player names from pool")
     return names
 
@@ -99,91 +110,222 @@ def find_inters(list_of_int_scores):
         
     return most_frequent_worst_player, highest_average_int_score_player
         
-def get_solo_duo_avg_blame_percent(match_data_list, playerOne, playerTwo = None):
-    logger.debug(f"Calculating blame percentage for {playerOne} across {len(match_data_list)} matches")
-    match_count = 0
-    percentages = []
-    if not match_data_list:  # ADD THIS
-        logger.warning(f"No match data for {playerOne}")
-        return 0, []
-    for match_data in match_data_list:
-        randoms_int = 0
-        personal_int = 0
-        match_count+=1
-        int_scores = calculate_int_scores(match_data)
-        for player in int_scores:
-            if player == playerOne:
-                personal_int += int_scores[player]
-            else:
-                randoms_int += int_scores[player]
-        total_int = randoms_int + personal_int
-        percentage = (personal_int/total_int)*100
-        percentages.append(percentage)
-
-    average_percentages = sum(percentages)/match_count
-    logger.info(f"{playerOne} avg blame percentage: {average_percentages:.1f}%")
-    return  average_percentages,percentages
-
-def get_solo_duo_avg_position(match_data_list,playerOne,playerTwo = None):
+def get_blame_percent(int_scores, player):
+    """Returns the share (0-100) of a match's total INT score that belongs to `player`."""
+    total_int = sum(int_scores.values())
+    if not total_int:
+        return 0
+    return (int_scores.get(player, 0) / total_int) * 100
+
+def get_position(int_scores, player):
+    """Returns where `player` placed among the losing players, 1 = lowest INT score (best)."""
+    sorted_players = sorted(int_scores, key=int_scores.get)
+    return sorted_players.index(player) + 1
+
+def get_blame_score(avg_percentage, avg_position):
+    """Combines the average blame percentage and position into one 0-100ish blame score."""
+    percentage_score = ((avg_percentage - 15) / 10) * 40
+    position_score = (avg_position / 4) * 60
+    return percentage_score + position_score
+
+def get_blame_verdict(blame_score):
+    """Returns the (emoji, verdict, advice) matching a blame score, or None if it is below every threshold."""
+    for threshold, emoji, verdict, advice in BLAME_THRESHOLDS:
+        if blame_score >= threshold:
+            return emoji, verdict, advice
+    return None
+
+def analyze_losses(match_data_list, player, puuid=None):
     """
-    Calculate a player's average position ranking across multiple matches based on INT scores.
-    
-    For each match, ranks all 5 losing players by their INT score (1 = best performer/lowest INT,
-    5 = worst performer/highest INT) and tracks where the target player placed.
-    
+    Scores every loss once (or reads its cached scores) and derives the whole blame analysis of a player from that single pass.
+
     Args:
-        match_data_list (list): List of match data dictionaries from get_loses_data_list()
-        playerOne (str): Riot ID of the target player to analyze
-        playerTwo (str, optional): Currently unused. Reserved for future duo analysis. Defaults to None.
-    
+        match_data_list (list): List of match records from get_loses_data_list()
+        player (str): Riot name of the player to analyze
+        puuid (str, optional): PUUID of the player. When given, the player is found by PUUID in every
+                               match, so games played under an older Riot name still count. Defaults to None.
+
     Returns:
-        tuple: (average_position, positions_list)
-            - average_position (float): Mean position across all matches (1.0 = always best, 5.0 = always worst)
-            - positions_list (list): Individual position for each match (1-5)
-    
-    Examples:
-        >>> # Player who consistently performed worst
-        >>> get_solo_duo_avg_position(matches, "BadPlayer")
-        (4.6, [5, 5, 4, 5, 4])
-        
-        >>> # Player who consistently performed best
-        >>> get_solo_duo_avg_position(matches, "GoodPlayer")
-        (1.4, [1, 2, 1, 1, 2])
-        
-        >>> # Average performer
-        >>> get_solo_duo_avg_position(matches, "OkayPlayer")
-        (3.0, [3, 2, 4, 3, 3])
-    
-    Note:
-        - Position 1 = lowest INT score = best performance in the loss
-        - Position 5 = highest INT score = worst performance in the loss
-        - Only analyzes the 5 players on the losing team
+        dict: {
+            "scores": per-match dicts of every losing player's INT score breakdown,
+            "match_count": number of matches the player was found in,
+            "percentages", "avg_percentage": blame percentage per match and on average,
+            "positions", "avg_position": placement among the losers per match and on average,
+            "metric_averages": the player's average sub-score per metric of INT_METRICS,
+            "worst_metric": the metric the player did worst in,
+            "blame_score": combined blame score (None without matches),
+            "verdict": (emoji, verdict, advice) tuple, or None
+        }
     """
-    logger.debug(f"Calculating position for {playerOne} across {len(match_data_list)} matches")
-    match_count = 0
+    logger.debug(f"Analyzing {len(match_data_list)} losses for {player}")
+    match_data_list = [as_match_record(match_data) for match_data in match_data_list]
+    scores = int_score_cache.get_breakdowns(match_data_list)
+    percentages = []
     positions = []
-    if not match_data_list:  # ADD THIS
-        logger.warning(f"No match data for {playerOne}")
-        return 0, []
-    for match_data in match_data_list:
-        randoms_int = 0
-        personal_int = 0
-        match_count+=1
-        int_scores = calculate_int_scores(match_data)
-        sorted_players = sorted(int_scores,key=int_scores.get)
-        for i, player in enumerate(sorted_players):
-            if player == playerOne:
-                place = i + 1
-        positions.append(place)
-
-    average_pos= sum(positions)/match_count
-    logger.info(f"{playerOne} avg position: {average_pos:.2f}/5")
-
-    return  average_pos,positions
+    metric_totals = dict.fromkeys(INT_METRICS, 0)
+
+    for match_data, breakdowns in zip(match_data_list, scores):
+        name = player
+        if puuid:
+            participant = match_data.get_participant(puuid)
+            name = participant.name if participant else None
+        if name not in breakdowns:
+            continue
+        int_scores = {loser: breakdown["int_score"] for loser, breakdown in breakdowns.items()}
+        percentages.append(get_blame_percent(int_scores, name))
+        positions.append(get_position(int_scores, name))
+        for metric in INT_METRICS:
+            metric_totals[metric] += breakdowns[name][metric]
+
+    match_count = len(percentages)
+    analysis = {
+        "scores": scores,
+        "match_count": match_count,
+        "percentages": percentages,
+        "positions": positions,
+        "avg_percentage": 0,
+        "avg_position": 0,
+        "metric_averages": {},
+        "worst_metric": None,
+        "blame_score": None,
+        "verdict": None
+    }
+    if not match_count:
+        logger.warning(f"{player} wasn't found in any of the {len(match_data_list)} losses")
+        return analysis
+
+    analysis["avg_percentage"] = sum(percentages) / match_count
+    analysis["avg_position"] = sum(positions) / match_count
+    analysis["metric_averages"] = {metric: total / match_count for metric, total in metric_totals.items()}
+    analysis["worst_metric"] = max(analysis["metric_averages"], key=analysis["metric_averages"].get)
+    analysis["blame_score"] = get_blame_score(analysis["avg_percentage"], analysis["avg_position"])
+    analysis["verdict"] = get_blame_verdict(analysis["blame_score"])
+
+    logger.info(
+        f"{player} analysis: score={analysis['blame_score']:.1f}, avg_pos={analysis['avg_position']:.2f}, "
+        f"avg_pct={analysis['avg_percentage']:.1f}%, worst metric={analysis['worst_metric']}"
+    )
+    return analysis
+
+class BlameProgressView(discord.ui.View):
+    """Cancel button under the !blame progress message. Stops fetching, the blame uses the losses found so far."""
+    def __init__(self, author_id, timeout=600):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.cancelled = False
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Only the command author can cancel this!", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.red)
+    async def cancel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.cancelled = True
+        button.disabled = True
+        button.label = "Cancelling..."
+        await interaction.response.edit_message(view=self)
+        self.stop()
+
+def format_blame_progress(header, progress, match_count, elapsed):
+    """
+    Builds the text of the !blame progress message.
+    The ETA assumes the loss ratio seen so far holds for the remaining matches.
+    """
+    losses = len(progress["losses"])
+    fetched = progress["fetched"]
+    lines = [
+        header,
+        f"📥 Matches fetched: **{fetched}** ({progress['cache_hits']} from cache)",
+        f"💔 Losses found: **{losses}/{match_count}**"
+    ]
+    if fetched and losses:
+        remaining_matches = (match_count - losses) * fetched / losses
+        eta = remaining_matches * elapsed / fetched
+        lines.append(f"⏱️ About {max(1, round(eta))}s left")
+    return "\n".join(lines)
+
+def format_mass_register_progress(done, total, result_lines):
+    """Builds the !massregister progress message: a count and the latest results, as they come in."""
+    message = f"**Mass Registration** : resolved {done}/{total} accounts...\n"
+    recent = result_lines[-MASS_REGISTER_PROGRESS_LINES:]
+    if len(result_lines) > len(recent):
+        message += f"... {len(result_lines) - len(recent)} earlier results\n"
+    return message + "\n".join(recent)
+
 
 class Blamer(commands.Cog):
     def __init__(self,bot):
         self.bot = bot
+        self.background_blames = asyncio.Queue()
+        self.background_blame_running = False
+        self.background_blame_worker = None
+
+    async def cog_unload(self):
+        """Stops the background blame queue and writes the pending registry changes. The shared Riot client is closed by the bot on shutdown."""
+        if self.background_blame_worker:
+            self.background_blame_worker.cancel()
+        await player_registry.flush()
+
+    async def collect_losses(self, ctx, header, riot_id, match_count, queue_name):
+        """
+        Fetches a player's losses while streaming progress into a message with a cancel button.
+        Every loss is scored as soon as it's found, so the final analysis reads cached scores.
+
+        Returns:
+            tuple: (losses found, the progress message, whether the author cancelled)
+        """
+        view = BlameProgressView(ctx.author.id)
+        message = await ctx.send(header, view=view)
+        started = time.monotonic()
+        last_edit = started
+        loss_data = []
+
+        fetched = 0
+        # Closing the generator right away cancels its fetches still in flight when we stop early.
+        async with contextlib.aclosing(iter_loses_data(riot_id=riot_id, count=match_count, queue_name=queue_name)) as losses:
+            async for progress in losses:
+                loss_data = progress["losses"]
+                fetched = progress["fetched"]
+                if progress["new_loss"]:
+                    await asyncio.to_thread(int_score_cache.get_breakdowns, [progress["new_loss"]])
+                if view.cancelled:
+                    logger.info(f"Blame cancelled by {ctx.author.name} after {progress['fetched']} matches")
+                    break
+                now = time.monotonic()
+                if now - last_edit >= BLAME_PROGRESS_EDIT_INTERVAL and not progress["done"]:
+                    last_edit = now
+                    try:
+                        await message.edit(content=format_blame_progress(header, progress, match_count, now - started))
+                    except discord.HTTPException as e:
+                        logger.warning(f"Failed to update blame progress: {e}")
+
+        view.stop()
+        # Scoring still runs after this, so the button has to go rather than fail when clicked.
+        try:
+            await message.edit(view=None)
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to remove the blame cancel button: {e}")
+        await budget_estimator.record_outcome(convert_queue_type_to_id(queue_name), fetched, len(loss_data))
+        return loss_data, message, view.cancelled
+
+    async def report_partial_losses(self, ctx, message, loss_data, match_count, cancelled):
+        """
+        Tells the author when fewer losses than asked were found (or kept, after cancelling).
+
+        Returns:
+            bool: False if there is nothing left to blame, in which case the progress message is cleaned up.
+        """
+        if cancelled and not loss_data:
+            await message.edit(content="🛑 Blame cancelled.", view=None)
+            return False
+        if cancelled:
+            await ctx.send(f"🛑 Stopped early, blaming with the {len(loss_data)} losses found so far.")
+        elif match_count > len(loss_data):
+            logger.info(f"Requested {match_count} matches but only found {len(loss_data)}")
+            await ctx.send(f"ℹ️ Only found {len(loss_data)} matches.")
+        return True
 
     @commands.command(aliases=['whydidwelose'])
     @commands.cooldown(1, 15, commands.BucketType.guild) 
@@ -201,22 +343,23 @@ class Blamer(commands.Cog):
 
         Usage: !blame [match_count] [queue]
         - match_count : how many of your most recent losses you want to look at. (default = 5, max = 25)
-                        Be CAREFUL! Big requests will take ages, so limit yourself to around 10 games!
+                        Big requests take a while! Progress is shown as matches come in, and you can
+                        cancel at any time to get blamed with the losses found so far.
         - queue : the queue type you want to look at (ex : flex, solo/duo etc.)
         
         - Example : !blame 5 Flex
         """
         logger.info(f"Blame command invoked by {ctx.author.name} in {ctx.guild.name if ctx.guild else 'DM'}: {match_count} matches, queue={queue}")
         author_name = ctx.author.name
-        registered_players = get_player_pool()
+        author_player = player_registry.get(author_name)
 
-        if author_name not in registered_players:
+        if author_player is None:
             logger.warning(f"Unregistered user {author_name} attempted to use blame command")
 
             await ctx.send(f"❌ {author_name} is not registered! Use `!register` first.")
             return
-        author_riot_id = registered_players[author_name]["riot_id"]
-        author_riot_name = registered_players[author_name]["riot_name"]
+        author_riot_id = author_player["riot_id"]
+        author_riot_name = author_player["riot_name"]
 
         queue_correct_name = convert_queue_aliases_to_queue(queue)
         if not queue_correct_name:
@@ -235,81 +378,117 @@ class Blamer(commands.Cog):
             match_count = 25
             await ctx.send("The match has been capped at 25 to avoid long wait times.")
 
+        queue_id = convert_queue_type_to_id(queue_correct_name)
+        estimate = budget_estimator.estimate_blame(author_riot_id, match_count, queue_id)
+        logger.info(
+            f"Blame estimate for {author_name}: {estimate['calls']} calls, ~{estimate['seconds']:.0f}s, "
+            f"{estimate['hit_rate'] * 100:.0f}% stored"
+        )
+        if estimate["seconds"] > BLAME_MAX_SECONDS:
+            trimmed_count = budget_estimator.max_blame_count(author_riot_id, match_count, queue_id, BLAME_MAX_SECONDS)
+            if trimmed_count < match_count:
+                await ctx.send(
+                    f"✂️ Looking at {match_count} losses would take about {estimate['seconds'] / 60:.0f} minutes right now, "
+                    f"so I'll look at your last **{trimmed_count}** instead."
+                )
+                match_count = trimmed_count
+                estimate = budget_estimator.estimate_blame(author_riot_id, match_count, queue_id)
+
+        if estimate["seconds"] > BLAME_BACKGROUND_AFTER_SECONDS:
+            # Long runs don't hold the guild cooldown, they wait their turn in the background queue.
+            ctx.command.reset_cooldown(ctx)
+            position = self.background_blames.qsize() + (1 if self.background_blame_running else 0)
+            queue_text = f" There {'is' if position == 1 else 'are'} {position} ahead of you." if position else ""
+            await ctx.send(
+                f"⏳ This needs about **{estimate['calls']}** Riot API calls (~{estimate['seconds']:.0f}s). "
+                f"I'll run it in the background and ping you when it's done.{queue_text}"
+            )
+            await self.queue_background_blame(ctx, author_riot_id, author_riot_name, match_count, queue_correct_name)
+            return
+
+        await self.run_blame(ctx, author_riot_id, author_riot_name, match_count, queue_correct_name)
+
+    async def run_blame(self, ctx, author_riot_id, author_riot_name, match_count, queue_correct_name, mention = ""):
+        """
+        Runs a !blame analysis and sends the result.
+        `mention` is put in front of the result, to ping the author of background runs.
+        """
+        author_name = ctx.author.name
+
         if not queue_correct_name == "Ranked Solo/Duo":
             proccesing_text = f"🔍 Let's see who lost you your last **{match_count}** {queue_correct_name} games...\n⌛ *This may take a moment.*"
-            proccesing_message = await ctx.send(proccesing_text)
+            loss_data, proccesing_message, cancelled = await self.collect_losses(ctx, proccesing_text, author_riot_id, match_count, queue_correct_name)
+            logger.info(f"Retrieved {len(loss_data)} losses for {author_name}")
+            if not await self.report_partial_losses(ctx, proccesing_message, loss_data, match_count, cancelled):
+                return
+
             async with ctx.typing():
-                loss_data = get_loses_data_list(riot_id=author_riot_id,count=match_count,queue_name=queue_correct_name)
-                logger.info(f"Retrieved {len(loss_data)} losses for {author_name}")
-                
-                if match_count > len(loss_data):
-                    logger.info(f"Requested {match_count} matches but only found {len(loss_data)}")
-                    await ctx.send(f"ℹ️ Only found {len(loss_data)} matches.")
-                
                 player_pool = get_player_pool_names()
-                list_of_int_scores = get_match_int_scores_list(loss_data, player_pool)
+                player_puuids = player_registry.get_puuid_names()
+                list_of_int_scores = await asyncio.to_thread(get_match_int_scores_list, loss_data, player_pool, player_puuids)
                 logger.debug(f"Calculated INT scores for {len(list_of_int_scores)} matches")
                 
                 frequent_inter, worst_average_inter = find_inters(list_of_int_scores)
 
             await proccesing_message.delete()
             if not frequent_inter or not worst_average_inter:
-                await ctx.send(f"❓ No registered players were in your {queue_correct_name} losses.")
+                await ctx.send(f"{mention}❓ No registered players were in your {queue_correct_name} losses.")
                 logger.warning(f"No registered players found in last {match_count} {queue_correct_name} losses of {author_name}")
                 return
 
             if frequent_inter != worst_average_inter:
                 logger.info(f"Flex blame result: frequent={frequent_inter}, worst_avg={worst_average_inter}")
                 await ctx.send(
-                f"Overall, the person who's lost you the most matches was **{frequent_inter}**, "
+                f"{mention}Overall, the person who's lost you the most matches was **{frequent_inter}**, "
                 f"while **{worst_average_inter}** played the worst on average during your losses.")
             else:
                 logger.info(f"Flex blame result: {worst_average_inter} was both frequent and worst average")
-                await ctx.send(f"Sheesh! **{worst_average_inter}** lost you your last {match_count} {queue_correct_name} games.")
+                await ctx.send(f"{mention}Sheesh! **{worst_average_inter}** lost you your last {match_count} {queue_correct_name} games.")
         else:
             proccesing_text = f"🔍 Let's see if you or your team are to blame for your last {match_count} soloQ losses...\n⌛ *This might take a while.*"
-            proccesing_message = await ctx.send(proccesing_text)
+            loss_data, proccesing_message, cancelled = await self.collect_losses(ctx, proccesing_text, author_riot_id, match_count, queue_correct_name)
+            logger.info(f"Retrieved {len(loss_data)} solo queue losses for {author_name}")
+            if not await self.report_partial_losses(ctx, proccesing_message, loss_data, match_count, cancelled):
+                return
 
             async with ctx.typing():
-                loss_data = get_loses_data_list(riot_id=author_riot_id,count=match_count,queue_name=queue_correct_name)
-                logger.info(f"Retrieved {len(loss_data)} solo queue losses for {author_name}")
-                
-                if match_count > len(loss_data):
-                    logger.info(f"Requested {match_count} matches but only found {len(loss_data)}")
-                    await ctx.send(f"ℹ️ Only found {len(loss_data)} matches.")
-                
-                avg_percentage, percentages = get_solo_duo_avg_blame_percent(loss_data,author_riot_name)
-                avg_pos , poses = get_solo_duo_avg_position(loss_data,author_riot_name)
-
-                percentage_score = ((avg_percentage - 15) / 10) * 40
-                position_score = (avg_pos / 4) * 60
-                blame_score = percentage_score + position_score
-                
-                logger.info(f"Solo blame calculated: score={blame_score:.1f}, avg_pos={avg_pos:.2f}, avg_pct={avg_percentage:.1f}%")
-
-            blame_thresholds = [
-            (70, "💀", "Yeah, it was definitely your fault.", "You were the main problem in these losses."),
-            (60, "💧", "Mostly your fault.", "You contributed significantly to these losses."),
-            (50, "😐", "About equal blame.", "You and your teammates share the responsibility."),
-            (25, "😅", "Your team lost you your games.", "Your team held you back more than you held them back."),
-            (0, "🙏", "Team gap.", "These losses were NOT on you.")
-            ]
+                analysis = await asyncio.to_thread(analyze_losses, loss_data, author_riot_name, author_riot_id)
 
             await proccesing_message.delete()
 
-            message = ""
-            for threshold, emoji, verdict, advice in blame_thresholds:
-                if blame_score >= threshold:
-                    message = f"{emoji} **{verdict}** *{advice}*"
-                    logger.info(f"Solo blame verdict for {author_name}: {verdict} (score={blame_score:.1f})")
-                    break
-            if message:
-                await ctx.send(message)
+            if analysis["verdict"]:
+                emoji, verdict, advice = analysis["verdict"]
+                logger.info(f"Solo blame verdict for {author_name}: {verdict} (score={analysis['blame_score']:.1f})")
+                await ctx.send(
+                    f"{mention}{emoji} **{verdict}** *{advice}*\n"
+                    f"📉 Your weakest stat in these losses: **{METRIC_NAMES[analysis['worst_metric']]}**"
+                )
             else:
                 logger.error(f"Unable to calculate blame score for {author_name}")
-                await ctx.send("Oops! Unable to calculate blame score.")
+                await ctx.send(f"{mention}Oops! Unable to calculate blame score.")
 
-    
+    async def queue_background_blame(self, ctx, author_riot_id, author_riot_name, match_count, queue_correct_name):
+        """
+        Queues a long !blame request, starting the worker if it isn't running.
+        The worker is started here rather than in cog_load, so it runs on the bot's loop.
+        """
+        if self.background_blame_worker is None or self.background_blame_worker.done():
+            self.background_blame_worker = asyncio.create_task(self.process_background_blames())
+        await self.background_blames.put((ctx, author_riot_id, author_riot_name, match_count, queue_correct_name))
+
+    async def process_background_blames(self):
+        """Runs queued long !blame requests one at a time."""
+        while True:
+            ctx, author_riot_id, author_riot_name, match_count, queue_correct_name = await self.background_blames.get()
+            self.background_blame_running = True
+            try:
+                await self.run_blame(ctx, author_riot_id, author_riot_name, match_count, queue_correct_name, mention=f"{ctx.author.mention} ")
+            except Exception as e:
+                logger.error(f"Background blame failed for {ctx.author.name}: {e}", exc_info=True)
+                await ctx.send(f"{ctx.author.mention} ❌ Something went wrong while blaming your losses.")
+            finally:
+                self.background_blame_running = False
+                self.background_blames.task_done()
 
     @commands.command(aliases=["riotsregister"])
     async def register(self, ctx, *, username = None):
@@ -334,59 +513,53 @@ class Blamer(commands.Cog):
         playername, tag = username.rsplit("#", 1)
         logger.debug(f"Parsed registration request: {playername}#{tag}")
 
+        author_name = ctx.author.name
+        # Both checked again when registering, these only save a Riot call.
+        if author_name in player_registry:
+            logger.warning(f"{author_name} attempted to register but is already registered")
+            await ctx.send(f"{ctx.author.mention}, you have already registered an account.")
+            return
+        if player_registry.get_by_riot_id(playername, tag):
+            logger.warning(f"{author_name} attempted to register {playername}#{tag} but it's already linked to another user")
+            await ctx.send(f"{ctx.author.mention}, this Riot account is already registered to another user.")
+            return
+
         try:
             logger.debug(f"Fetching Riot account data for {playername}#{tag}")
-            response = requests.get(f"https://europe.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{playername}/{tag}",
-                                params={"api_key": riot_token}, timeout=10)
-            response.raise_for_status()
-        except requests.exceptions.Timeout:
+            data = await riot_client.resolve_account(playername, tag)
+        except asyncio.TimeoutError:
             logger.error(f"Timeout fetching profile for {playername}#{tag}")
             await ctx.send("❌ Request timed out. Please try again.")
             return
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429:
-                logger.warning("Rate limit hit during registration")
-                await ctx.send("❌ Rate limit reached. Please try again in a moment.")
-            elif e.response.status_code == 404:
-                logger.warning(f"Riot account not found: {playername}#{tag}")
-                await ctx.send(f"❌ Riot account **{playername}#{tag}** not found.")
-            else:
-                logger.error(f"HTTP error during registration: {e}")
-                await ctx.send("❌ Error contacting Riot API. Please try again.")
-            return
         except Exception as e:
             logger.error(f"Unexpected error in register: {e}", exc_info=True)
             await ctx.send("❌ An unexpected error occurred. Please try again.")
             return
 
-        data = response.json()
-        author_name = ctx.author.name
-        player_dict = {}
+        if not data:
+            logger.warning(f"Riot account not found: {playername}#{tag}")
+            await ctx.send(f"❌ Riot account **{playername}#{tag}** not found.")
+            return
+
         player_dict = {
             "riot_name" : data["gameName"],
             "riot_tag" : data["tagLine"],
-            "riot_id" : data["puuid"]
+            "riot_id" : data["puuid"],
+            "platform" : data["platform"],
+            "region" : data["region"]
         }
 
-        with open("data/players.json", "r", encoding="utf8") as file:
-            players_dict = json.load(file)
-
-        if author_name in players_dict.keys():
-            logger.warning(f"{author_name} attempted to register but is already registered")
-            await ctx.send(f"{ctx.author.mention}, you have already registered an account.")
-            return
-        
-        for discord_name, existing_player in players_dict.items():
-            if existing_player.get("riot_id") == player_dict["riot_id"]:
-                logger.warning(f"{author_name} attempted to register {playername}#{tag} but it's already linked to {discord_name}")
+        try:
+            await player_registry.add(author_name, player_dict)
+        except RegistrationError as e:
+            logger.warning(f"{author_name} attempted to register {playername}#{tag}: {e}")
+            if author_name in player_registry:
+                await ctx.send(f"{ctx.author.mention}, you have already registered an account.")
+            else:
                 await ctx.send(f"{ctx.author.mention}, this Riot account is already registered to another user.")
-                return
-
-        players_dict[author_name] = player_dict
-        with open("data/players.json","w",encoding="utf8") as file:
-            json.dump(players_dict,file,indent=4)
+            return
         
-        logger.info(f"Successfully registered {author_name} to Riot account {playername}#{tag} (PUUID: {player_dict['riot_id']})")
+        logger.info(f"Successfully registered {author_name} to Riot account {playername}#{tag} (PUUID: {player_dict['riot_id']}, platform: {player_dict['platform']})")
         await ctx.send(f"{ctx.author.mention}, we have linked you to account **{playername}**#{tag}.")
 
     @commands.command(aliases=["mass_register"], hidden=True)
@@ -410,13 +583,10 @@ class Blamer(commands.Cog):
             await ctx.send("❌ Please provide user data in the format:\n`discord_name riotname#tag` (one per line)")
             return
         
-        with open("data/players.json", "r", encoding="utf8") as file:
-            players_dict = json.load(file)
-        
         lines = users_data.strip().split('\n')
         logger.info(f"Processing {len(lines)} registration lines")
-        success_count = 0
         failed = []
+        requested = {}
         
         for line in lines:
             line = line.strip()
@@ -442,53 +612,74 @@ class Blamer(commands.Cog):
             playername = playername.strip()
             tag = tag.strip()
             
-            if discord_name in players_dict:
+            if discord_name in player_registry or discord_name in requested:
                 failed.append(f"⚠️ {discord_name}: Already registered")
                 continue
-            
+            requested[discord_name] = (playername, tag)
+
+        async def resolve(discord_name, playername, tag):
+            logger.debug(f"Mass register: Fetching {playername}#{tag} for {discord_name}")
             try:
-                logger.debug(f"Mass register: Fetching {playername}#{tag} for {discord_name}")
-                response = requests.get(
-                    f"https://europe.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{playername}/{tag}",
-                    params={"api_key": riot_token},
-                    timeout=10
-                )
-                
-                if response.status_code != 200:
+                return discord_name, await riot_client.resolve_account(playername, tag), None
+            except Exception as e:
+                return discord_name, None, e
+
+        # Every account is resolved at once, the shared client paces the calls under the rate limits.
+        tasks = [asyncio.ensure_future(resolve(discord_name, *riot_id)) for discord_name, riot_id in requested.items()]
+        # Per-line results, in the order the lookups complete.
+        result_lines = list(failed)
+        registrations = {}
+        done = 0
+        message = await ctx.send(format_mass_register_progress(done, len(tasks), result_lines))
+        last_edit = time.monotonic()
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                discord_name, data, error = await next_done
+                playername, tag = requested[discord_name]
+                done += 1
+                failed_count = len(failed)
+                if error:
+                    logger.error(f"Mass register error for {discord_name}: {error}")
+                    failed.append(f"❌ {discord_name}: Error - {str(error)}")
+                elif not data:
                     logger.warning(f"Mass register: Riot account not found for {discord_name}: {playername}#{tag}")
                     failed.append(f"❌ {discord_name}: Riot account not found")
-                    continue
-                
-                data = response.json()
-                
-                riot_id = data["puuid"]
-                already_registered = False
-                for existing_player in players_dict.values():
-                    if existing_player.get("riot_id") == riot_id:
-                        logger.warning(f"Mass register: {playername}#{tag} already registered")
-                        failed.append(f"❌ {discord_name}: Riot account already registered")
-                        already_registered = True
-                        break
-                
-                if already_registered:
-                    continue
-                
-                players_dict[discord_name] = {
-                    "riot_name": data["gameName"],
-                    "riot_tag": data["tagLine"],
-                    "riot_id": riot_id
-                }
+                elif player_registry.get_by_puuid(data["puuid"]):
+                    logger.warning(f"Mass register: {playername}#{tag} already registered")
+                    failed.append(f"❌ {discord_name}: Riot account already registered")
+                else:
+                    registrations[discord_name] = {
+                        "riot_name": data["gameName"],
+                        "riot_tag": data["tagLine"],
+                        "riot_id": data["puuid"],
+                        "platform": data["platform"],
+                        "region": data["region"]
+                    }
+                    result_lines.append(f"🔎 {discord_name}: found **{data['gameName']}**#{data['tagLine']} (`{data['platform']}`)")
+                result_lines.extend(failed[failed_count:])
+
+                now = time.monotonic()
+                if now - last_edit >= MASS_REGISTER_EDIT_INTERVAL:
+                    last_edit = now
+                    try:
+                        await message.edit(content=format_mass_register_progress(done, len(tasks), result_lines))
+                    except discord.HTTPException as e:
+                        logger.warning(f"Failed to update mass register progress: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # One registry commit for the whole batch. Conflicts inside the batch (e.g. the same account twice) are caught here.
+        success_count = 0
+        for discord_name, error in (await player_registry.add_many(registrations.items())).items():
+            if error:
+                failed.append(f"❌ {discord_name}: {error}")
+            else:
                 success_count += 1
-                logger.info(f"Mass register: Successfully added {discord_name} -> {playername}#{tag}")
-                
-            except Exception as e:
-                logger.error(f"Mass register error for {discord_name}: {e}")
-                failed.append(f"❌ {discord_name}: Error - {str(e)}")
-        
+                logger.info(f"Mass register: Successfully added {discord_name} -> {registrations[discord_name]['riot_name']}#{registrations[discord_name]['riot_tag']}")
         if success_count > 0:
-            with open("data/players.json", "w", encoding="utf8") as file:
-                json.dump(players_dict, file, indent=4)
-            logger.info(f"Mass register: Saved {success_count} new registrations to players.json")
+            await player_registry.flush()
+            logger.info(f"Mass register: Saved {success_count} new registrations to the player registry")
         
         result_msg = f"**Mass Registration Complete**\n✅ Successfully registered: {success_count}\n"
         if failed:
@@ -497,7 +688,10 @@ class Blamer(commands.Cog):
                 result_msg += f"\n... and {len(failed) - 10} more"
         
         logger.info(f"Mass register complete: {success_count} success, {len(failed)} failed")
-        await ctx.send(result_msg)
+        try:
+            await message.edit(content=result_msg)
+        except discord.HTTPException:
+            await ctx.send(result_msg)
 
     @commands.command(aliases=["wholepool"],hidden=True)
     @commands.is_owner()
@@ -520,6 +714,37 @@ class Blamer(commands.Cog):
             await ctx.send(mass_register_command)
             await ctx.send(f"================================================")
 
+    @commands.command(aliases=["resolve_regions"], hidden=True)
+    @commands.is_owner()
+    async def resolveregions(self, ctx):
+        """
+        Looks up and stores the platform of players registered before routing was stored. Owner only.
+        Until then, their requests go to the default platform.
+        Usage: !resolveregions
+        """
+        players_dict = player_registry.get_all()
+        missing = [discord_name for discord_name, player in players_dict.items() if not player.get("platform")]
+        if not missing:
+            await ctx.send("✅ Every registered player already has a platform.")
+            return
+
+        platforms = await asyncio.gather(
+            *(riot_client.get_active_platform(players_dict[discord_name]["riot_id"]) for discord_name in missing),
+            return_exceptions=True
+        )
+        resolved = []
+        for discord_name, platform in zip(missing, platforms):
+            if isinstance(platform, BaseException) or not platform:
+                logger.warning(f"Could not resolve the platform of {discord_name}: {platform}")
+                continue
+            if discord_name not in player_registry:
+                continue
+            await player_registry.update(discord_name, platform=platform, region=get_region(platform))
+            resolved.append(f"{discord_name}: `{platform}`")
+
+        logger.info(f"Resolved the platform of {len(resolved)}/{len(missing)} players")
+        await ctx.send(f"Resolved **{len(resolved)}**/{len(missing)} players.\n" + "\n".join(resolved))
+
     @commands.command(aliases=["removeuser"], hidden=True)
     @commands.is_owner()
     async def unregister(self, ctx, discord_name: str = None):
@@ -536,26 +761,16 @@ class Blamer(commands.Cog):
             await ctx.send("❌ Please provide a Discord username to unregister!")
             return
         
-        with open("data/players.json", "r", encoding="utf8") as file:
-            players_dict = json.load(file)
-        
-        if discord_name not in players_dict:
+        # Remove the player
+        riot_info = await player_registry.remove(discord_name)
+        if riot_info is None:
             logger.warning(f"Unregister attempted for non-existent user: {discord_name}")
             await ctx.send(f"❌ **{discord_name}** is not registered.")
             return
         
-        # Get the Riot account info before removing
-        riot_info = players_dict[discord_name]
         riot_name = riot_info["riot_name"]
         riot_tag = riot_info["riot_tag"]
         
-        # Remove the player
-        del players_dict[discord_name]
-        
-        # Save the updated dictionary
-        with open("data/players.json", "w", encoding="utf8") as file:
-            json.dump(players_dict, file, indent=4)
-        
         logger.info(f"Successfully unregistered {discord_name} (was linked to {riot_name}#{riot_tag})")
         await ctx.send(f"✅ Successfully unregistered **{discord_name}** (was linked to **{riot_name}**#{riot_tag}).")
         
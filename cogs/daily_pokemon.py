@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import requests
 import discord
@@ -7,12 +8,18 @@ from discord import Color, Embed
 import datetime
 import json
 import math
+import time
 import os
 from typing import Dict, List, Union
 import aiohttp
 from zoneinfo import ZoneInfo
+from config import API_MAX_RETRIES, API_REQUEST_TIMEOUT
+from resilience import CircuitOpenError, NegativeCache, backoff_delay, get_breaker, is_retryable_status
 logger = logging.getLogger('discord.daily_pokemon')
 
+POKEAPI_HOST = "pokeapi.co"
+pokeapi_not_found = NegativeCache()
+
 
 EMOJI_TYPE_DICT = {
     "bug" : "🪲",
@@ -193,6 +200,48 @@ class PokemonRatingManager:
         print("Migration complete. Database is now ordered by Pokémon name.")
     
 
+def pokeapi_get(url: str, description: str = "Pokémon"):
+    """
+    GETs a PokeAPI resource and returns the decoded JSON, or None if it failed.
+
+    Blocking, so callers on the event loop run it in a thread. Failed calls are retried at most
+    `API_MAX_RETRIES` times with jittered backoff, 404s are remembered for a while, and nothing
+    is sent while the PokeAPI circuit breaker is open.
+    """
+    if url in pokeapi_not_found:
+        return None
+    breaker = get_breaker(POKEAPI_HOST)
+    for attempt in range(API_MAX_RETRIES + 1):
+        try:
+            is_trial = breaker.before_call()
+        except CircuitOpenError as e:
+            logger.error(f"Failed to fetch {description} data: {e}")
+            return None
+        try:
+            response = requests.get(url, timeout=API_REQUEST_TIMEOUT)
+            if response.status_code == 200:
+                breaker.record_success()
+                return response.json()
+            if not is_retryable_status(response.status_code):
+                breaker.record_success()
+                if response.status_code == 404:
+                    pokeapi_not_found.add(url)
+                logger.error(f"Failed to fetch {description} data: {response.status_code}")
+                return None
+            if response.status_code != 429:
+                breaker.record_failure(f"HTTP {response.status_code}")
+            error = response.status_code
+        except requests.RequestException as e:
+            breaker.record_failure(repr(e))
+            error = repr(e)
+        finally:
+            if is_trial:
+                breaker.release_trial()
+        if attempt < API_MAX_RETRIES:
+            time.sleep(backoff_delay(attempt))
+    logger.error(f"Failed to fetch {description} data after {API_MAX_RETRIES + 1} attempts: {error}")
+    return None
+
 def get_random_pokemon():
 
     data_location = 'data/unusedPokemonIDs.json'
@@ -226,61 +275,21 @@ def get_random_pokemon():
         json.dump(unused_ids, f)
 
     url = f"https://pokeapi.co/api/v2/pokemon/{mon_id}"
-    response = requests.get(url)
-
-    if response.status_code != 200:
-        logger.error(f"Failed to fetch Pokémon data: {response.status_code}")
-        return None
-    
-    data = response.json()
-
-    return data
+    return pokeapi_get(url)
 
 def query_pokemon_by_id(mon_id: int):
 
     url = f"https://pokeapi.co/api/v2/pokemon/{mon_id}"
-    response = requests.get(url)
-
-    if response.status_code != 200:
-        logger.error(f"Failed to fetch Pokémon data: {response.status_code}")
-        return None
-    
-    data = response.json()
-
-    return data
+    return pokeapi_get(url)
 
 def get_pokemon_species_data(species_url: str):
-    response = requests.get(species_url)
-
-    if response.status_code != 200:
-        logger.error(f"Failed to fetch Pokémon species data: {response.status_code}")
-        return None
-    
-    data = response.json()
-
-    return data
+    return pokeapi_get(species_url, "Pokémon species")
 
 def get_evolution_chain_data(evolution_chain_url: str):
-    response = requests.get(evolution_chain_url)
-
-    if response.status_code != 200:
-        logger.error(f"Failed to fetch Pokémon evolution chain data: {response.status_code}")
-        return None
-    
-    data = response.json()
-
-    return data
+    return pokeapi_get(evolution_chain_url, "Pokémon evolution chain")
 
 def get_ability_data(ability_url: str):
-    response = requests.get(ability_url)
-
-    if response.status_code != 200:
-        logger.error(f"Failed to fetch Pokémon ability data: {response.status_code}")
-        return None
-    
-    data = response.json()
-
-    return data
+    return pokeapi_get(ability_url, "Pokémon ability")
 
 def get_abillity_description(ability_data):
     entries = ability_data['effect_entries']
@@ -533,10 +542,10 @@ class DailyPokemon(commands.Cog):
 
     @tasks.loop(time=datetime.time(hour=22, minute=59, tzinfo=ZoneInfo("Europe/Bucharest")))
     async def daily_pokemon(self):
-        data = get_random_pokemon() 
+        data = await asyncio.to_thread(get_random_pokemon)
         if not data: 
             return
-        parsed_data = parse_pokemon_data(data)
+        parsed_data = await asyncio.to_thread(parse_pokemon_data, data)
         embed = create_embed(parsed_data)
         view = DailyRatingView()
 
@@ -575,12 +584,12 @@ class DailyPokemon(commands.Cog):
     @commands.is_owner()
     async def random_mon(self, ctx):
 
-        data = get_random_pokemon()
+        data = await asyncio.to_thread(get_random_pokemon)
         if not data:
             await ctx.send("Failed to fetch Pokémon data.")
             return
         
-        parsed_data = parse_pokemon_data(data)
+        parsed_data = await asyncio.to_thread(parse_pokemon_data, data)
 
         embed = create_embed(parsed_data)
 
@@ -591,7 +600,11 @@ class DailyPokemon(commands.Cog):
     @commands.command(hidden=True)
     @commands.is_owner()
     async def specific_mon(self, ctx, mon_id: int):
-        await ctx.send(embed=create_embed(parse_pokemon_data(query_pokemon_by_id(mon_id))))
+        data = await asyncio.to_thread(query_pokemon_by_id, mon_id)
+        if not data:
+            await ctx.send("Failed to fetch Pokémon data.")
+            return
+        await ctx.send(embed=create_embed(await asyncio.to_thread(parse_pokemon_data, data)))
 
 
     @commands.command()
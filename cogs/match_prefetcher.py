@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from discord.ext import commands, tasks
+from config import (
+    MATCH_FETCH_WINDOW,
+    MATCH_PREFETCH_INTERVAL_MINUTES,
+    MATCH_PREFETCH_DEPTH,
+    MATCH_PREFETCH_QUEUES,
+    MATCH_PREFETCH_TIMELINES
+)
+from match_history import match_history
+from match_store import match_store, timeline_store
+from player_registry import player_registry
+from rate_limiter import BACKGROUND, request_lane
+from riot_api import riot_client
+logger = logging.getLogger('discord.match_prefetcher')
+
+
+class MatchPrefetcher(commands.Cog):
+    """
+    Discord cog that keeps the local match data of every registered player warm.
+
+    On a schedule, it syncs the solo/flex match history of every registered player
+    and fetches the details of any recent match that isn't stored yet, so `!blame` and
+    `!ranked_report` can answer from local data.
+    With `MATCH_PREFETCH_TIMELINES`, it also stores the timeline summary of every one of those matches.
+    All of its requests run in the background lane of the Riot rate limiter, so they only
+    use the share of the budget left to background work and always yield to commands.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.last_run = None
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Starts the prefetcher once the bot is ready (on_ready fires again on reconnects)."""
+        if not self.prefetch_matches.is_running():
+            self.prefetch_matches.start()
+
+    async def cog_unload(self):
+        if self.prefetch_matches.is_running():
+            self.prefetch_matches.cancel()
+
+    async def prefetch_player(self, puuid: str, queue_id: int):
+        """
+        Syncs one player's match history for a queue and stores its recent missing matches
+        (and their timeline summaries, if enabled).
+
+        Returns:
+            tuple: (new matches stored, matches that were already stored)
+        """
+        match_ids = (await match_history.sync(puuid, queue_id))[:MATCH_PREFETCH_DEPTH]
+        missing = [match_id for match_id in match_ids if match_id not in match_store]
+        for i in range(0, len(missing), MATCH_FETCH_WINDOW):
+            window = missing[i:i + MATCH_FETCH_WINDOW]
+            await asyncio.gather(*(riot_client.get_match_record(match_id) for match_id in window))
+        if MATCH_PREFETCH_TIMELINES:
+            missing_timelines = [match_id for match_id in match_ids if match_id not in timeline_store]
+            for i in range(0, len(missing_timelines), MATCH_FETCH_WINDOW):
+                window = missing_timelines[i:i + MATCH_FETCH_WINDOW]
+                await asyncio.gather(*(riot_client.get_timeline_summary(match_id) for match_id in window))
+        return len(missing), len(match_ids) - len(missing)
+
+    @tasks.loop(minutes=MATCH_PREFETCH_INTERVAL_MINUTES)
+    async def prefetch_matches(self):
+        """Walks the registered player pool and warms the match cache."""
+        started = time.monotonic()
+        fetched = 0
+        already_stored = 0
+        players = player_registry.get_all()
+        with request_lane(BACKGROUND):
+            for discord_name, player in players.items():
+                for queue_id in MATCH_PREFETCH_QUEUES:
+                    try:
+                        new, cached = await self.prefetch_player(player["riot_id"], queue_id)
+                        fetched += new
+                        already_stored += cached
+                    except Exception as e:
+                        logger.error(f"Prefetch failed for {discord_name} (queue {queue_id}): {e}", exc_info=True)
+
+        self.last_run = {
+            "players": len(players),
+            "fetched": fetched,
+            "already_stored": already_stored,
+            "seconds": time.monotonic() - started
+        }
+        logger.info(
+            f"Prefetched {fetched} new matches for {len(players)} players "
+            f"({already_stored} already stored) in {self.last_run['seconds']:.1f}s"
+        )
+
+    @prefetch_matches.before_loop
+    async def before_prefetch_matches(self):
+        await self.bot.wait_until_ready()
+
+    @commands.command(aliases=["prefetch_status"], hidden=True)
+    @commands.is_owner()
+    async def prefetchstatus(self, ctx):
+        """
+        Shows the result of the last match prefetch run. Owner only.
+        Usage: !prefetchstatus
+        """
+        if not self.last_run:
+            await ctx.send("The match prefetcher hasn't finished a run yet.")
+            return
+        run = self.last_run
+        await ctx.send(
+            f"Last prefetch: **{run['fetched']}** new matches for **{run['players']}** players "
+            f"({run['already_stored']} already stored) in {run['seconds']:.1f}s.\n"
+            f"Match store: **{len(match_store)}** matches, **{len(timeline_store)}** timeline summaries."
+        )
+
+
+async def setup(bot):
+    try:
+        await bot.add_cog(MatchPrefetcher(bot))
+        logger.info("MatchPrefetcher cog loaded successfully")
+    except Exception as e:
+        logger.error(f"Failed to load MatchPrefetcher cog: {e}")
+        raise
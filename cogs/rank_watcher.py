@@ -0,0 +1,299 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from discord.ext import commands, tasks
+from config import (
+    RANK_WATCH_CHANNEL_ID,
+    RANK_WATCH_TICK_SECONDS,
+    RANK_WATCH_MIN_INTERVAL,
+    RANK_WATCH_MAX_INTERVAL,
+    RANK_WATCH_STREAK_LENGTH
+)
+from cogs.ranked import rank_to_lp, get_rank_emoji, HELPER_EMOJIS
+from lp_history import lp_history
+from player_registry import player_registry
+from rate_limiter import BACKGROUND, request_lane
+from riot_api import riot_client
+logger = logging.getLogger('discord.rank_watcher')
+
+WATCHED_QUEUE = "RANKED_SOLO_5x5"
+
+
+def get_division_value(tier, rank):
+    """Flattens a tier and division into a comparable number (LP left out). -1 for unranked."""
+    if not tier:
+        return -1
+    return rank_to_lp(tier, rank, 0)
+
+
+def format_rank(tier, rank):
+    if not tier:
+        return "Unranked"
+    if tier in ("MASTER", "GRANDMASTER", "CHALLENGER"):
+        return tier.capitalize()
+    return f"{tier.capitalize()} {rank}"
+
+
+def update_streak(streak, new_wins, new_losses, hot_streak=False):
+    """
+    Carries a win/loss streak over the games played between two polls.
+    Positive streaks are wins in a row, negative ones losses in a row.
+
+    When both wins and losses happened between polls, their order is unknown, so the streak
+    restarts; Riot's hotStreak flag (3+ wins in a row) is used as a floor when set.
+    """
+    if new_wins and not new_losses:
+        return streak + new_wins if streak > 0 else new_wins
+    if new_losses and not new_wins:
+        return streak - new_losses if streak < 0 else -new_losses
+    if new_wins and new_losses:
+        return RANK_WATCH_STREAK_LENGTH if hot_streak else 0
+    return streak
+
+
+class RankWatcher(commands.Cog):
+    """
+    Discord cog that watches the solo queue rank of every registered player and announces
+    promotions, demotions and win/loss streaks in the `RANK_WATCH_CHANNEL_ID` channel.
+
+    Each poll is a single league-v4 call per player, run in the background lane of the Riot
+    rate limiter. Players are polled adaptively: anyone whose game count changed since their
+    last poll is polled again after `RANK_WATCH_MIN_INTERVAL` seconds, and every idle poll
+    doubles their interval, up to `RANK_WATCH_MAX_INTERVAL`. Players who aren't playing
+    cost almost nothing, while promotions show up minutes after the game ends.
+
+    The last snapshot of every player is kept in `data/rankWatcher.json`, so restarts neither
+    re-announce old changes nor miss the ones that happened while the bot was down.
+    """
+
+    def __init__(self, bot, filepath='data/rankWatcher.json'):
+        self.bot = bot
+        self.filepath = filepath
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        # Last seen state per PUUID: tier, rank, lp, wins, losses, streak, interval and next_poll (epoch seconds).
+        self.snapshots = self._load_db()
+        self._file_lock = asyncio.Lock()
+        self.polls = 0
+        self.announcements = 0
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Starts the rank watcher once the bot is ready (on_ready fires again on reconnects)."""
+        if not self.watch_ranks.is_running():
+            self.watch_ranks.start()
+
+    async def cog_unload(self):
+        if self.watch_ranks.is_running():
+            self.watch_ranks.cancel()
+
+    def _load_db(self):
+        """Internal helper to load data from disk safely."""
+        try:
+            with open(self.filepath, 'r', encoding="utf8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_db(self, data) -> None:
+        temp_path = f"{self.filepath}.tmp"
+        with open(temp_path, 'w', encoding="utf8") as f:
+            json.dump(data, f, indent=4)
+        os.replace(temp_path, self.filepath)
+
+    async def _save_db(self) -> None:
+        snapshot = json.loads(json.dumps(self.snapshots))
+        async with self._file_lock:
+            await asyncio.to_thread(self._write_db, snapshot)
+
+    async def poll_player(self, puuid):
+        """
+        Fetches a player's current solo queue entry.
+
+        Returns:
+            dict: {"tier", "rank", "lp", "wins", "losses", "hot_streak"}, with tier None when unranked,
+            or None if Riot couldn't be reached.
+        """
+        entries = await riot_client.get_ranked_data(puuid)
+        if entries is None:
+            return None
+        for entry in entries:
+            if entry.get("queueType") == WATCHED_QUEUE:
+                return {
+                    "tier": entry.get("tier"),
+                    "rank": entry.get("rank", ""),
+                    "lp": entry.get("leaguePoints", 0),
+                    "wins": entry.get("wins", 0),
+                    "losses": entry.get("losses", 0),
+                    "hot_streak": entry.get("hotStreak", False)
+                }
+        return {"tier": None, "rank": "", "lp": 0, "wins": 0, "losses": 0, "hot_streak": False}
+
+    def diff_snapshot(self, previous, current):
+        """
+        Compares two snapshots of a player.
+
+        Returns:
+            tuple: (list of (kind, detail) changes worth announcing, the player's new streak)
+        """
+        changes = []
+        old_value = get_division_value(previous["tier"], previous["rank"])
+        new_value = get_division_value(current["tier"], current["rank"])
+        if previous["tier"] is None and current["tier"] is not None:
+            changes.append(("placed", None))
+        elif new_value > old_value:
+            changes.append(("promoted", None))
+        elif new_value < old_value:
+            changes.append(("demoted", None))
+
+        new_wins = max(current["wins"] - previous["wins"], 0)
+        new_losses = max(current["losses"] - previous["losses"], 0)
+        old_streak = previous.get("streak", 0)
+        streak = update_streak(old_streak, new_wins, new_losses, current["hot_streak"])
+
+        if streak >= RANK_WATCH_STREAK_LENGTH > old_streak:
+            changes.append(("hot_streak", streak))
+        elif streak <= -RANK_WATCH_STREAK_LENGTH < old_streak:
+            changes.append(("cold_streak", -streak))
+        elif old_streak >= RANK_WATCH_STREAK_LENGTH and streak < old_streak:
+            changes.append(("hot_streak_ended", old_streak))
+        elif old_streak <= -RANK_WATCH_STREAK_LENGTH and streak > old_streak:
+            changes.append(("cold_streak_ended", -old_streak))
+        return changes, streak
+
+    def format_change(self, player, previous, current, kind, detail):
+        name = f"**{player['riot_name']}#{player['riot_tag']}**"
+        new_rank = format_rank(current["tier"], current["rank"])
+        rank_emoji = get_rank_emoji(current["tier"], current["rank"]) if current["tier"] else ""
+        old_rank = format_rank(previous["tier"], previous["rank"])
+        if kind == "placed":
+            return f"📋 {name} placed into {rank_emoji} **{new_rank}** ({current['lp']} LP)!"
+        if kind == "promoted":
+            return f"📈 {name} got promoted from {old_rank} to {rank_emoji} **{new_rank}**!"
+        if kind == "demoted":
+            return f"📉 {name} got demoted from {old_rank} to {rank_emoji} **{new_rank}**."
+        if kind == "hot_streak":
+            return f"{HELPER_EMOJIS['HOT_STREAK']} {name} is on a **{detail} game win streak**! ({new_rank}, {current['lp']} LP)"
+        if kind == "cold_streak":
+            return f"{HELPER_EMOJIS['COLD_STREAK']} {name} has lost **{detail} games in a row**. ({new_rank}, {current['lp']} LP)"
+        if kind == "hot_streak_ended":
+            return f"🧯 {name}'s {detail} game win streak is over."
+        return f"☀️ {name} broke their {detail} game losing streak!"
+
+    def schedule_next_poll(self, snapshot, active, now):
+        """Polls active players again soon, and backs off exponentially on idle ones."""
+        if active:
+            interval = RANK_WATCH_MIN_INTERVAL
+        else:
+            interval = min(snapshot.get("interval", RANK_WATCH_MIN_INTERVAL) * 2, RANK_WATCH_MAX_INTERVAL)
+        snapshot["interval"] = interval
+        snapshot["next_poll"] = now + interval
+
+    async def watch_player(self, puuid, player, now):
+        """
+        Polls one player and updates their snapshot.
+
+        Returns:
+            list: announcement messages for this player.
+        """
+        current = await self.poll_player(puuid)
+        if current is None:
+            # A failed call isn't an unranked player, keep the snapshot and try again next tick.
+            return []
+        self.polls += 1
+        previous = self.snapshots.get(puuid)
+
+        if previous is None:
+            # First time seeing this player, only store the baseline.
+            snapshot = dict(current, streak=0)
+            self.schedule_next_poll(snapshot, active=True, now=now)
+            self.snapshots[puuid] = snapshot
+            return []
+
+        changes, streak = self.diff_snapshot(previous, current)
+        active = (current["wins"], current["losses"]) != (previous["wins"], previous["losses"])
+        snapshot = dict(current, streak=streak, interval=previous.get("interval", RANK_WATCH_MIN_INTERVAL))
+        self.schedule_next_poll(snapshot, active, now)
+        self.snapshots[puuid] = snapshot
+
+        if active and current["tier"]:
+            await lp_history.append(
+                puuid, rank_to_lp(current["tier"], current["rank"], current["lp"]), current["wins"], current["losses"]
+            )
+        return [self.format_change(player, previous, current, kind, detail) for kind, detail in changes]
+
+    async def get_channel(self):
+        channel = self.bot.get_channel(RANK_WATCH_CHANNEL_ID)
+        if channel is None:
+            channel = await self.bot.fetch_channel(RANK_WATCH_CHANNEL_ID)
+        return channel
+
+    @tasks.loop(seconds=RANK_WATCH_TICK_SECONDS)
+    async def watch_ranks(self):
+        """Polls every registered player whose next poll is due, and posts what changed."""
+        now = int(time.time())
+        players = {player["riot_id"]: player for player in player_registry.get_all().values() if player.get("riot_id")}
+        due = [
+            puuid for puuid in players
+            if self.snapshots.get(puuid, {}).get("next_poll", 0) <= now
+        ]
+        if not due:
+            return
+
+        with request_lane(BACKGROUND):
+            results = await asyncio.gather(
+                *(self.watch_player(puuid, players[puuid], now) for puuid in due),
+                return_exceptions=True
+            )
+
+        messages = []
+        for puuid, result in zip(due, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Rank watch poll failed for {players[puuid]['riot_name']}: {result}")
+                continue
+            messages.extend(result)
+        await self._save_db()
+
+        if not messages:
+            return
+        try:
+            channel = await self.get_channel()
+            await channel.send("\n".join(messages))
+            self.announcements += len(messages)
+        except Exception as e:
+            logger.error(f"Failed to post rank changes: {e}", exc_info=True)
+
+    @watch_ranks.before_loop
+    async def before_watch_ranks(self):
+        await self.bot.wait_until_ready()
+
+    @commands.command(aliases=["rankwatch_status"], hidden=True)
+    @commands.is_owner()
+    async def rankwatchstatus(self, ctx):
+        """
+        Shows how often each registered player is being polled by the rank watcher. Owner only.
+        Usage: !rankwatchstatus
+        """
+        now = int(time.time())
+        players = player_registry.get_all()
+        message = f"**Rank watcher**: {self.polls} polls, {self.announcements} announcements since startup.\n"
+        for discord_name, player in players.items():
+            snapshot = self.snapshots.get(player.get("riot_id"))
+            if not snapshot:
+                message += f"`{discord_name}` : not polled yet\n"
+                continue
+            message += (
+                f"`{discord_name}` : {format_rank(snapshot['tier'], snapshot['rank'])}, "
+                f"every {snapshot['interval'] // 60}m, next in {max(snapshot['next_poll'] - now, 0) // 60}m\n"
+            )
+        await ctx.send(message)
+
+
+async def setup(bot):
+    try:
+        await bot.add_cog(RankWatcher(bot))
+        logger.info("RankWatcher cog loaded successfully")
+    except Exception as e:
+        logger.error(f"Failed to load RankWatcher cog: {e}")
+        raise
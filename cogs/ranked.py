@@ -1,19 +1,24 @@
-from discord.ext import commands
+from discord.ext import commands, tasks
 import discord
 import logging
 from dotenv import load_dotenv
 import requests
 import os
-import json
-import aiohttp
 import asyncio
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
+from riot_api import riot_client
+from match_history import match_history
+from budget_estimator import budget_estimator
+from lp_history import lp_history
+from config import RANKED_REPORT_BACKGROUND_AFTER_SECONDS, RANKED_REPORT_PLAYER_TTL, RANKED_REPORT_REFRESH_MINUTES
+from rate_limiter import BACKGROUND, request_lane
+from singleflight import SingleFlight
+from player_registry import player_registry
 logger = logging.getLogger('discord.ranked')
 
 load_dotenv()
 riot_token = os.getenv("RIOT_KEY")
 
-# TODO : add up and down for recent lp changes
 
 RANKED_EMOJIS = {
     "IRON": "⚫",        
@@ -66,6 +71,28 @@ def rank_to_lp(rank, tier, lp):
     total_lp = (tier_value * 400) + (rank_value * 100) + lp
     return total_lp
 
+def format_lp_delta(delta: int) -> str:
+    """Formats an LP change, e.g. "▲ +23 LP"."""
+    if delta > 0:
+        return f"▲ +{delta} LP"
+    if delta < 0:
+        return f"▼ {delta} LP"
+    return "± 0 LP"
+
+def format_lp_changes(puuid) -> str:
+    """
+    Returns a player's LP change over the last 24h and 7d, with a 7 day sparkline.
+    Read from the local LP history only, empty if there is none yet.
+    """
+    if not puuid:
+        return ""
+    day_delta = lp_history.get_delta(puuid, 24 * 60 * 60)
+    if day_delta is None:
+        return ""
+    week_delta = lp_history.get_delta(puuid, 7 * 24 * 60 * 60)
+    sparkline = lp_history.get_sparkline(puuid, 7 * 24 * 60 * 60)
+    return f"{format_lp_delta(day_delta)} (24h) · {format_lp_delta(week_delta)} (7d) `{sparkline}`\n"
+
 def get_kda_emoji(kda: float) -> str:
     if kda>=5.0:
         return "✦"
@@ -186,74 +213,23 @@ def check_streak(recent_matches):
     return None
 
 
-class RiotAPIClient:
-    """
-    Riot API manager.
-    """
-    def __init__(self, token):
-        self.token = token
-        self.headers = {"X-Riot-Token": self.token}
-        self.puuid_cache = {}
-        self.semaphore = asyncio.Semaphore(5)
-
-    async def request(self, url):
-        """Generic async request wrapper with Rate Limit handling."""
-        async with self.semaphore:
-            async with aiohttp.ClientSession() as session:
-                while True:
-                    async with session.get(url, headers=self.headers) as response:
-                        if response.status == 429:
-                            retry_after = int(response.headers.get("Retry-After", 1))
-                            logger.warning(f"Rate limited. Sleeping {retry_after}s.")
-                            await asyncio.sleep(retry_after)
-                            continue
-
-                        if response.status != 200:
-                            logger.error(f"API Error {response.status}: {url}")
-                            return None
-                        
-                        return await response.json()
-
-    async def get_emoji_for_rank(self, rank):
-        """Get the emoji corresponding to a given rank."""
-        app_emojis = await self.fetch_application_emojis()
-        target_emoji = discord.utils.get(app_emojis, name=rank)
-
-    async def get_puuid(self, name, tag):
-        cache_key = f"{name.lower()}#{tag.lower()}"
-        if cache_key in self.puuid_cache:
-            return self.puuid_cache[cache_key]
-
-        url = f"https://europe.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{name}/{tag}"
-        data = await self.request(url)
-        
-        if data:
-            self.puuid_cache[cache_key] = data.get("puuid")
-            return data.get("puuid")
-        return None
-
-    async def get_ranked_data(self, puuid, region="eun1"):
-        url = f"https://{region}.api.riotgames.com/lol/league/v4/entries/by-puuid/{puuid}"
-        return await self.request(url)
-
-    async def get_match_history(self, puuid, count, region="europe", queue=420):
-        url = f"https://{region}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?count={count}&queue={queue}"
-        return await self.request(url)
-
-    async def get_match_details(self, match_id, region="europe"):
-        url = f"https://{region}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-        return await self.request(url)
-
 class Ranked(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.api_client = RiotAPIClient(os.getenv("RIOT_KEY"))
-        self.report_cache = {
-            "data": None,
-            "timestamp": discord.utils.utcnow() - timedelta(minutes=10)
-        }
+        self.api_client = riot_client
+        # Per-player report entries, as {discord_id: {"entry": report entry or None if unranked, "updated_at": datetime or None}}.
+        self.player_reports = {}
+        # Last complete report, as {"data": entries sorted by LP, "timestamp": datetime}. Only ever replaced whole.
+        self.report_snapshot = None
+        self.report_refreshes = SingleFlight("ranked_report")
+        self.background_reports = set()
         logger.info("Ranked cog initialized")
 
+    async def cog_unload(self):
+        """Stops the report refresher. The shared Riot client is closed by the bot on shutdown."""
+        if self.keep_reports_warm.is_running():
+            self.keep_reports_warm.cancel()
+
     def parse_ranked_data(self, data, gamemode = None):
         """Parse ranked data into a readable format."""
         if not data:
@@ -280,10 +256,10 @@ class Ranked(commands.Cog):
         return (results)
 
     async def get_performance_stats(self, puuid, count=25):
-        match_ids = await self.api_client.get_match_history(puuid, count)
+        match_ids = (await match_history.sync(puuid, queue_id=420))[:count]
         if not match_ids: return None
 
-        tasks = [self.api_client.get_match_details(mid) for mid in match_ids]
+        tasks = [self.api_client.get_match_record(mid) for mid in match_ids]
         matches_data = await asyncio.gather(*tasks)
 
         kills, deaths, assists = 0, 0, 0
@@ -291,11 +267,11 @@ class Ranked(commands.Cog):
         recent_matches = []
         for match in matches_data:
             if not match: continue
-            participant = next((p for p in match['info']['participants'] if p['puuid'] == puuid), None)
+            participant = match.get_participant(puuid)
             if participant:
-                k, d, a = participant['kills'], participant['deaths'], participant['assists']
+                k, d, a = participant.kills, participant.deaths, participant.assists
                 kills += k; deaths += d; assists += a
-                recent_matches.append("w") if participant['win'] else recent_matches.append("l")
+                recent_matches.append("w") if participant.win else recent_matches.append("l")
                 valid += 1
 
         if valid == 0: return None
@@ -316,6 +292,9 @@ class Ranked(commands.Cog):
             return None
 
         ranked_raw = await self.api_client.get_ranked_data(puuid)
+        if ranked_raw is None:
+            # The league call failed, which says nothing about whether the player is ranked.
+            return None
         ranked_data = self.parse_ranked_data(ranked_raw, gamemode="RANKED_SOLO_5x5")
         if isinstance(ranked_data, str):
             return {
@@ -329,6 +308,7 @@ class Ranked(commands.Cog):
         performance_stats = await self.get_performance_stats(puuid=puuid, count=count)
 
         return {
+            "puuid": puuid,
             "ranked_data": ranked_data,
             "recent_performance": {
                 "performance_stats":performance_stats,
@@ -336,67 +316,169 @@ class Ranked(commands.Cog):
             }
         }
 
-    async def create_ranked_embed(self, author_summoner_name, author_tag):
-        print("creating ranked embed")
-        embed = discord.Embed(
-            title=f"🏆 Ranked Report",
-            color=discord.Color.gold()
-        )
+    async def compile_player_report(self, discord_id, player):
+        """
+        Compiles the report entry of one registered player.
 
-        with open('data/players.json', 'r') as f:
-            players_data = json.load(f)
+        Returns:
+            dict: the player's report entry, or None if they have no ranked data (unranked players are left out).
 
-        report_players_data = []
+        Raises:
+            LookupError: if the player's Riot data couldn't be fetched.
+        """
+        summoner_name = player['riot_name']
+        tag = player['riot_tag']
 
+        data = await self.compile_ranked_data(summoner_name, tag)
+        if data is None:
+            raise LookupError(f"no Riot data for {summoner_name}#{tag}")
 
-        if (discord.utils.utcnow() - self.report_cache["timestamp"]).total_seconds() < 300:
-            logger.info("Using cached ranked report data")
-            report_players_data = self.report_cache["data"]
-        else:
-            for player in players_data:
-                summoner_name = players_data[player]['riot_name']
-                tag = players_data[player]['riot_tag']
-
-                data = await self.compile_ranked_data(summoner_name, tag)
-                if data is None:
-                    continue
-
-                #print(f"proccesing {summoner_name}#{tag}")
-                #print("data:", json.dumps(data,indent=4))
-
-                ranked_data = data["ranked_data"]
-                performance_stats = data["recent_performance"]["performance_stats"]
-                games_analyzed = data["recent_performance"]["games_analyzed"]
-                if isinstance(ranked_data, str):
-                    continue
-                
-                total_lp = rank_to_lp(
-                    ranked_data['tier'],
-                    ranked_data['rank'],
-                    ranked_data['lp']
-                )
-                current_player_data = {
-                    "discord_id": player,
-                    "riot_name": summoner_name,
-                    "riot_tag": tag,
-                    "ranked_data": ranked_data,
-                    "performance_stats": performance_stats,
-                    "games_analyzed": games_analyzed,
-                    "total_lp": total_lp
-                }
+        ranked_data = data["ranked_data"]
+        if isinstance(ranked_data, str):
+            return None
 
-                report_players_data.append(current_player_data)
+        return {
+            "discord_id": discord_id,
+            "puuid": data["puuid"],
+            "riot_name": summoner_name,
+            "riot_tag": tag,
+            "ranked_data": ranked_data,
+            "performance_stats": data["recent_performance"]["performance_stats"],
+            "games_analyzed": data["recent_performance"]["games_analyzed"],
+            "total_lp": rank_to_lp(ranked_data['tier'], ranked_data['rank'], ranked_data['lp']),
+            "stale": False
+        }
 
-                self.report_cache["data"] = report_players_data
-                self.report_cache["timestamp"] = discord.utils.utcnow()
+    def is_report_stale(self, discord_id):
+        """True if a player's report entry is missing or older than RANKED_REPORT_PLAYER_TTL."""
+        report = self.player_reports.get(discord_id)
+        if not report or not report["updated_at"]:
+            return True
+        return (discord.utils.utcnow() - report["updated_at"]).total_seconds() >= RANKED_REPORT_PLAYER_TTL
+
+    async def refresh_player_reports(self, players_data):
+        """
+        Recompiles the report entries of every player whose entry is stale, concurrently
+        (the shared rate limiter paces them), then swaps in a new complete report snapshot.
+
+        A player whose compile fails (including a failed league call, which is not the same as
+        being unranked) keeps their previous entry, marked stale, or gets an empty stale entry
+        if there is none, so nobody silently drops off the report. Failed players
+        are retried on the next refresh.
+        Nothing is visible to readers until the whole refresh is done.
+        """
+        due = [discord_id for discord_id in players_data if self.is_report_stale(discord_id)]
+        results = await asyncio.gather(
+            *(self.compile_player_report(discord_id, players_data[discord_id]) for discord_id in due),
+            return_exceptions=True
+        )
 
+        now = discord.utils.utcnow()
+        player_reports = {
+            discord_id: report for discord_id, report in self.player_reports.items() if discord_id in players_data
+        }
+        for discord_id, result in zip(due, results):
+            if not isinstance(result, BaseException):
+                player_reports[discord_id] = {"entry": result, "updated_at": now}
+                if result:
+                    ranked_data = result["ranked_data"]
+                    await lp_history.append(result["puuid"], result["total_lp"], ranked_data["wins"], ranked_data["losses"])
+                continue
+
+            logger.warning(f"Failed to compile ranked data for {discord_id}: {result}")
+            previous = player_reports.get(discord_id)
+            if previous and previous["entry"]:
+                player_reports[discord_id] = {"entry": dict(previous["entry"], stale=True), "updated_at": previous["updated_at"]}
+            elif previous:
+                # Last seen unranked, they stay out of the report until a compile succeeds.
+                continue
+            else:
+                player_reports[discord_id] = {
+                    "entry": {
+                        "discord_id": discord_id,
+                        "riot_name": players_data[discord_id]['riot_name'],
+                        "riot_tag": players_data[discord_id]['riot_tag'],
+                        "ranked_data": None,
+                        "performance_stats": None,
+                        "games_analyzed": 0,
+                        "total_lp": -1,
+                        "stale": True
+                    },
+                    "updated_at": None
+                }
 
-                
+        report_players_data = [report["entry"] for report in player_reports.values() if report["entry"]]
         report_players_data.sort(key=lambda x: x['total_lp'], reverse=True)
+        self.player_reports = player_reports
+        self.report_snapshot = {"data": report_players_data, "timestamp": now}
+        logger.info(f"Refreshed ranked data of {len(due)} players ({len(players_data) - len(due)} still fresh)")
+
+    async def refresh_reports(self):
+        """Refreshes the stale report entries of the registered players. Concurrent calls share one refresh."""
+        players_data = player_registry.get_all()
+        await self.report_refreshes.do("players", lambda: self.refresh_player_reports(players_data))
+
+    def refresh_reports_in_background(self):
+        """Starts a background refresh of the stale report entries, if one isn't already running."""
+        async def refresh():
+            try:
+                with request_lane(BACKGROUND):
+                    await self.refresh_reports()
+            except Exception as e:
+                logger.error(f"Background ranked report refresh failed: {e}", exc_info=True)
+
+        task = asyncio.create_task(refresh())
+        self.background_reports.add(task)
+        task.add_done_callback(self.background_reports.discard)
+
+    @tasks.loop(minutes=RANKED_REPORT_REFRESH_MINUTES)
+    async def keep_reports_warm(self):
+        """
+        Keeps every registered player's report entry fresh, so !ranked_report never waits on Riot.
+        This is also what samples LP history every RANKED_REPORT_REFRESH_MINUTES.
+        """
+        try:
+            with request_lane(BACKGROUND):
+                await self.refresh_reports()
+        except Exception as e:
+            logger.error(f"Ranked report refresh failed: {e}", exc_info=True)
+
+    @keep_reports_warm.before_loop
+    async def before_keep_reports_warm(self):
+        await self.bot.wait_until_ready()
+
+    async def create_ranked_embed(self, author_summoner_name, author_tag):
+        print("creating ranked embed")
+        embed = discord.Embed(
+            title=f"🏆 Ranked Report",
+            color=discord.Color.gold()
+        )
+
+        players_data = player_registry.get_all()
+
+        if self.report_snapshot is None:
+            # Nothing to show yet (e.g. right after startup), build the first snapshot now.
+            await self.refresh_reports()
+        elif any(self.is_report_stale(discord_id) for discord_id in players_data):
+            logger.info("Rendering ranked report from the last snapshot while stale players refresh")
+            self.refresh_reports_in_background()
+        snapshot = self.report_snapshot
+        report_players_data = snapshot["data"]
+
         for player in report_players_data:
             ranked_data = player["ranked_data"]
             performance_stats = player["performance_stats"]
 
+            print(f"checking {author_summoner_name} against r={player['riot_name']}")
+            if author_summoner_name == player["riot_name"]:
+                name = f"**➡ __{player['riot_name']}__**"
+            else:
+                name = f"{player['riot_name']}"
+
+            if ranked_data is None:
+                embed.add_field(name=name, value="⚠️ *Couldn't fetch ranked data right now.*", inline=False)
+                continue
+
             rank_emoji = get_rank_emoji(ranked_data['tier'], ranked_data['rank'])
             
             if ranked_data['tier'] == "UNRANKED":
@@ -407,6 +489,7 @@ class Ranked(commands.Cog):
             field_value = f"{rank_emoji} {rank_str}\n"
             winrate = ranked_data['winrate']
             field_value += f"**{int(winrate)}% WR** ({ranked_data["wins"]}W / {ranked_data["losses"]}L)\n"
+            field_value += format_lp_changes(player.get("puuid"))
 
             if performance_stats:
                 avg_kills = performance_stats.get("avg_kills", 0)
@@ -434,7 +517,7 @@ class Ranked(commands.Cog):
                             recent_match_emojis += win_emoji
                         else:
                             recent_match_emojis += loss_emoji
-            streak = check_streak(player["performance_stats"]["recent_matches"])
+            streak = check_streak(performance_stats["recent_matches"]) if performance_stats else None
             if streak == "hotstreak":
                 recent_match_emojis += hot_streak_emoji
             elif streak == "coldstreak":
@@ -442,11 +525,8 @@ class Ranked(commands.Cog):
 
             
             field_value += f"Past 5 Matches : {recent_match_emojis}\n"
-            print(f"checking {author_summoner_name} against r={player['riot_name']}")
-            if author_summoner_name == player["riot_name"]:
-                name = f"**➡ __{player['riot_name']}__**"
-            else:
-                name = f"{player['riot_name']}"
+            if player.get("stale"):
+                field_value += "⚠️ *Couldn't refresh, showing older data.*\n"
 
             embed.add_field(
                 name=name,
@@ -454,7 +534,7 @@ class Ranked(commands.Cog):
                 inline=False
             )
         
-        cache_unix = int(self.report_cache["timestamp"].timestamp())    
+        cache_unix = int(snapshot["timestamp"].timestamp())
         embed.description=f"Last updated: <t:{cache_unix}:R>"
         return embed
 
@@ -480,20 +560,40 @@ class Ranked(commands.Cog):
 
         print("called by:", discord_name)
 
-        with open('data/players.json', 'r') as f:
-            players_data = json.load(f)
-
-        if discord_name not in players_data:
+        player = player_registry.get(discord_name)
+        if player is None:
             await ctx.send("❌ Your Discord name is not linked to a Riot account.")
             return
         
-        summoner_name = players_data[discord_name]['riot_name']
-        tag = players_data[discord_name]['riot_tag']
+        summoner_name = player['riot_name']
+        tag = player['riot_tag']
 
         print(f"{discord_name} is linked to {summoner_name}#{tag}")
 
+        if self.report_snapshot is None:
+            estimate = budget_estimator.estimate_ranked_report(player_registry.get_all())
+            logger.info(f"Ranked report estimate: {estimate['calls']} calls, ~{estimate['seconds']:.0f}s")
+            if estimate["seconds"] > RANKED_REPORT_BACKGROUND_AFTER_SECONDS:
+                await ctx.send(
+                    f"⏳ Refreshing everyone's ranked data needs about **{estimate['calls']}** Riot API calls "
+                    f"(~{estimate['seconds']:.0f}s). I'll ping you when the report is ready."
+                )
+                task = asyncio.create_task(self.send_ranked_report_later(ctx, summoner_name, tag))
+                self.background_reports.add(task)
+                task.add_done_callback(self.background_reports.discard)
+                return
+
         await ctx.send(embed=await self.create_ranked_embed(summoner_name, tag))
 
+    async def send_ranked_report_later(self, ctx, summoner_name, tag):
+        """Builds a ranked report in the background and pings the author with it."""
+        try:
+            embed = await self.create_ranked_embed(summoner_name, tag)
+            await ctx.send(ctx.author.mention, embed=embed)
+        except Exception as e:
+            logger.error(f"Background ranked report failed: {e}", exc_info=True)
+            await ctx.send(f"{ctx.author.mention} ❌ Failed to build the ranked report.")
+
     @ranked_report.error
     async def ranked_report_error(self, ctx, error):
         if isinstance(error, commands.CommandOnCooldown):
@@ -501,10 +601,31 @@ class Ranked(commands.Cog):
         else:
             raise error
 
+    @commands.command(aliases=["riot_status"], hidden=True)
+    @commands.is_owner()
+    async def riotstatus(self, ctx):
+        """
+        Shows how the Riot API budget of every host is being used. Owner only.
+        Usage: !riotstatus
+        """
+        message = "**Riot API status**\n"
+        if not self.api_client.rate_limiters:
+            message += "No Riot host has been called yet.\n"
+        for host, limiter in sorted(self.api_client.rate_limiters.items()):
+            message += f"**{host}** : budget headroom **{limiter.headroom() * 100:.0f}%**\n"
+            for lane, metrics in limiter.get_lane_metrics().items():
+                message += (
+                    f"`{lane}` : {metrics['waiting']} waiting, {metrics['served']} served, "
+                    f"avg wait {metrics['avg_wait']:.2f}s, max wait {metrics['max_wait']:.2f}s\n"
+                )
+        await ctx.send(message)
+
     @commands.Cog.listener()
     async def on_ready(self):
-        """Event listener example"""
+        """Starts the report refresher once the bot is ready (on_ready fires again on reconnects)."""
         logger.info("Ranked cog is ready")
+        if not self.keep_reports_warm.is_running():
+            self.keep_reports_warm.start()
 
 # ============================================================================
 # Setup Function
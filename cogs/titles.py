@@ -1,7 +1,8 @@
 from discord.ext import commands, tasks
 import discord
 import json
-import requests
+import aiohttp
+import asyncio
 import datetime
 import logging
 import os
@@ -23,8 +24,11 @@ from config import (
     TITLE_ASSIGNMENT_THRESHOLD,
     SHORT_RANGE_THRESHOLD,
     LONG_RANGE_THRESHOLD,
-    API_REQUEST_TIMEOUT
+    API_REQUEST_TIMEOUT,
+    API_MAX_RETRIES
 )
+from resilience import NegativeCache, backoff_delay, get_breaker, is_retryable_status
+from singleflight import SingleFlight
 
 logger = logging.getLogger('discord.titles')
 
@@ -35,6 +39,13 @@ logger = logging.getLogger('discord.titles')
 load_dotenv()
 hv_token = os.getenv("HD_KEY")
 STANDARD_HEADERS = {"Authorization": hv_token}
+henrik_in_flight = SingleFlight("henrikdev")
+henrik_not_found = NegativeCache()
+HENRIK_HOST = "api.henrikdev.xyz"
+
+
+class HenrikNotFoundError(LookupError):
+    """Raised when HenrikDev answered 404 to a request, just now or recently enough to be cached."""
 
 
 def get_emoji_from_player_name(player_name : str):
@@ -620,7 +631,59 @@ class Match():
             
 
         
-def get_last_match(puuid, match_type = None):
+async def _henrik_get(url, params=None):
+    """
+    Performs a GET on the HenrikDev API and returns the decoded JSON.
+    Rate limited and server errors are retried at most `API_MAX_RETRIES` times, with jittered backoff.
+
+    Raises:
+        aiohttp.ClientResponseError: on an error status
+        resilience.CircuitOpenError: while HenrikDev is failing, without calling it
+    """
+    breaker = get_breaker(HENRIK_HOST)
+    timeout = aiohttp.ClientTimeout(total=API_REQUEST_TIMEOUT)  # Prevent infinite hangs
+    async with aiohttp.ClientSession(headers=STANDARD_HEADERS, timeout=timeout) as session:
+        for attempt in range(API_MAX_RETRIES + 1):
+            is_trial = breaker.before_call()
+            try:
+                async with session.get(url, params=params) as response:
+                    if not is_retryable_status(response.status):
+                        breaker.record_success()
+                        response.raise_for_status()  # Raises exception for 4xx status codes
+                        return await response.json()
+                    if response.status != 429:
+                        breaker.record_failure(f"HTTP {response.status}")
+                    if attempt == API_MAX_RETRIES:
+                        response.raise_for_status()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                breaker.record_failure(repr(e))
+                if attempt == API_MAX_RETRIES:
+                    raise
+            finally:
+                if is_trial:
+                    breaker.release_trial()
+            await asyncio.sleep(backoff_delay(attempt))
+
+async def henrik_get(url, params=None):
+    """
+    Coalesced HenrikDev GET. Concurrent identical requests share a single call.
+    The returned data is shared between callers, so it must not be mutated.
+
+    Raises:
+        HenrikNotFoundError: if HenrikDev has nothing at `url` (404s are remembered for a while)
+    """
+    key = (url, tuple(sorted((params or {}).items())))
+    if key in henrik_not_found:
+        raise HenrikNotFoundError(f"{url} not found (cached)")
+    try:
+        return await henrik_in_flight.do(key, lambda: _henrik_get(url, params))
+    except aiohttp.ClientResponseError as e:
+        if e.status == 404:
+            henrik_not_found.add(key)
+            raise HenrikNotFoundError(f"{url} not found") from e
+        raise
+
+async def get_last_match(puuid, match_type = None):
     """
     Fetch the last match for a player from Henrik API.
     
@@ -632,22 +695,15 @@ def get_last_match(puuid, match_type = None):
         Dictionary containing match data
         
     Raises:
-        requests.RequestException: Network or API errors
+        HenrikNotFoundError: Unknown player
+        aiohttp.ClientError: Network or API errors
         ValueError: Invalid API response structure
     """
     url = f"https://api.henrikdev.xyz/valorant/v4/by-puuid/matches/eu/pc/{puuid}"
-    if match_type:
-        url += f"?mode={match_type}"
+    params = {"mode": match_type} if match_type else None
     
     try:
-        response = requests.get(
-            url, 
-            headers=STANDARD_HEADERS, 
-            timeout=API_REQUEST_TIMEOUT  # Prevent infinite hangs
-        )
-        response.raise_for_status()  # Raises exception for 4xx/5xx status codes
-        
-        data = response.json()
+        data = await henrik_get(url, params=params)
         
         # Validate response structure
         if "data" not in data:
@@ -658,34 +714,35 @@ def get_last_match(puuid, match_type = None):
         
         return data["data"][0]
         
-    except requests.Timeout:
+    except asyncio.TimeoutError:
         logger.error(f"API request timed out for player {puuid}")
         raise
-    except requests.HTTPError as e:
-        if e.response.status_code == 429:
+    except HenrikNotFoundError:
+        logger.error(f"No HenrikDev matches found for player {puuid}")
+        raise
+    except aiohttp.ClientResponseError as e:
+        if e.status == 429:
             logger.error("API rate limit exceeded")
         else:
-            logger.error(f"API returned error {e.response.status_code}: {e}")
+            logger.error(f"API returned error {e.status}: {e}")
         raise
-    except requests.RequestException as e:
+    except aiohttp.ClientError as e:
         logger.error(f"Network error fetching match for {puuid}: {e}")
         raise
     except (KeyError, IndexError, ValueError) as e:
         logger.error(f"Unexpected API response structure: {e}")
         raise
 
-def get_match_stats(match_id):
+async def get_match_stats(match_id):
 
     url = f"https://api.henrikdev.xyz/valorant/v4/match/eu/{match_id}"
 
-    response = requests.get(url, headers=STANDARD_HEADERS)
-    data = response.json()
-    return data
+    return await henrik_get(url)
 
-def get_last_premier_match_stats():
+async def get_last_premier_match_stats():
     for player in DAG_MEMBERS:
         puuid = DAG_MEMBERS[player]["hv_id"]
-        match_stats = get_last_match(puuid=puuid, match_type="premier")
+        match_stats = await get_last_match(puuid=puuid, match_type="premier")
         return match_stats
     return None
 
@@ -781,7 +838,10 @@ class Titles(commands.Cog):
     @commands.command(hidden=True)
     @commands.is_owner()
     async def last_match_test(self,ctx):
-        match_data = get_last_premier_match_stats()
+        try:
+            match_data = await get_last_premier_match_stats()
+        except HenrikNotFoundError:
+            return await ctx.send("❌ No premier match found on HenrikDev.")
         match = create_match_object_from_last_premier(match_data=match_data, main_player_id='64792ac3-0873-55f5-9348-725082445eef')
         for player in match.main_players:
             message = f"{player.name}:\n "
@@ -798,7 +858,10 @@ class Titles(commands.Cog):
             location: "here" (DM) or "server" (public channel)
             mention: "at" (mention @DAG role) or "noat" (just say "DAG")
         """
-        match_data = get_last_premier_match_stats()
+        try:
+            match_data = await get_last_premier_match_stats()
+        except HenrikNotFoundError:
+            return await ctx.send("❌ No premier match found on HenrikDev.")
         match = create_match_object_from_last_premier(match_data=match_data, main_player_id='64792ac3-0873-55f5-9348-725082445eef')
         rounds_won = match.get_main_team_score()
         rounds_lost = match.get_enemy_team_score()
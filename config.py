@@ -10,6 +10,49 @@ YKTP_GUILD_ID = 890252683657764894
 
 # API Configuration
 API_REQUEST_TIMEOUT = 10  # seconds
+MATCH_FETCH_WINDOW = 5  # max match details fetched concurrently by !blame
+MATCH_RECORD_CACHE_SIZE = 1000  # compact match records kept in memory (a few KB each)
+BLAME_PROGRESS_EDIT_INTERVAL = 2  # min seconds between edits of the !blame progress message
+MASS_REGISTER_EDIT_INTERVAL = 1  # min seconds between edits of the !massregister progress message
+MASS_REGISTER_PROGRESS_LINES = 15  # latest per-line results shown while !massregister runs
+
+# Pre-flight estimates (budget_estimator.py)
+RIOT_AVERAGE_LATENCY = 0.35  # seconds per Riot call, on top of rate limit waits
+BLAME_BACKGROUND_AFTER_SECONDS = 20  # longer !blame runs are queued and run in the background
+BLAME_MAX_SECONDS = 300  # longer !blame runs are trimmed to fewer losses
+RANKED_REPORT_BACKGROUND_AFTER_SECONDS = 15  # longer !ranked_report refreshes run in the background
+
+# Ranked report cache (cogs/ranked.py)
+RANKED_REPORT_PLAYER_TTL = 300  # seconds before a player's ranked data is refreshed
+RANKED_REPORT_REFRESH_MINUTES = 5  # how often the background refresher runs
+
+# Promotion/demotion watcher (cogs/rank_watcher.py)
+RANK_WATCH_CHANNEL_ID = MARBLE_CHANNEL_ID  # where rank changes are announced
+RANK_WATCH_TICK_SECONDS = 30  # how often the watcher looks for players due a poll
+RANK_WATCH_MIN_INTERVAL = 120  # seconds between polls of a player who is playing
+RANK_WATCH_MAX_INTERVAL = 1800  # seconds between polls of an idle player
+RANK_WATCH_STREAK_LENGTH = 3  # games in a row announced as a win/loss streak
+
+# Riot API routing and connection pools (one pool and rate limiter per Riot host)
+DEFAULT_PLATFORM = "eun1"  # platform of players registered before routing was stored, and of unknown PUUIDs
+RIOT_CONNECTIONS_PER_HOST = 10
+RIOT_DNS_CACHE_TTL = 300  # seconds
+RIOT_KEEPALIVE_TIMEOUT = 60  # seconds an idle connection is kept open
+RIOT_BACKGROUND_BUDGET_SHARE = 0.5  # share of each rate limit window background jobs may use
+
+# Upstream resilience (resilience.py), for Riot, HenrikDev and PokeAPI
+API_MAX_RETRIES = 3  # retries of a failed or rate limited request before giving up
+RETRY_BASE_DELAY = 0.5  # seconds, doubled on every retry (with jitter)
+RETRY_MAX_DELAY = 8  # seconds, cap of a single backoff
+NEGATIVE_CACHE_TTL = 120  # seconds a 404 is remembered
+BREAKER_FAILURE_THRESHOLD = 5  # failures in a row that open a host's circuit breaker
+BREAKER_RESET_SECONDS = 60  # seconds an open breaker fails fast before trying the host again
+
+# Background match prefetching (cogs/match_prefetcher.py)
+MATCH_PREFETCH_INTERVAL_MINUTES = 10
+MATCH_PREFETCH_DEPTH = 50  # most recent matches kept stored per player and queue
+MATCH_PREFETCH_QUEUES = [420, 440]  # Ranked Solo/Duo, Ranked Flex
+MATCH_PREFETCH_TIMELINES = False  # also store timeline summaries (one more, large, call per match)
 
 
 #TITLES.PY CONFIGS:
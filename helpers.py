@@ -1,11 +1,16 @@
-import requests
+import asyncio
 import json
 import os
 import logging
 from dotenv import load_dotenv
 logger = logging.getLogger('discord.helpers')
 
-from match_score_calculator import calculate_int_scores
+from config import MATCH_FETCH_WINDOW
+from int_score_cache import int_score_cache
+from match_records import as_match_record
+from riot_api import riot_client
+from match_history import match_history
+from match_store import match_store
 
 load_dotenv()
 riot_token = os.getenv("RIOT_KEY")
@@ -100,85 +105,97 @@ def convert_queue_aliases_to_queue(queue_alias):
             return queue_name
     return None
     
-def get_matches_by_player_id(riot_id, queue_name=None, count=20, start=0):
+async def get_match_record_by_id(match_id):
     """
-    Gets a list of match IDs based on a player's ID.
-    Args:
-        riot_id: player's PUUID
-        queue_name: the name of a specific queue type. (optional)
-        count: number of match IDs to return (default: 20, max: 100)
-        start: starting index for pagination (default: 0)
-    Returns:
-        data
+    Returns a match as a compact MatchRecord based on a match ID, or None.
     """
-    #POSSIBLE QUEUE TYPES:
-        #"Ranked Solo/Duo"
-        #"Ranked Flex"
-        #"Normal Draft"
-        #"Normal Blind"
-        #"Normal (Quickplay)"
-        #"ARAM"
-        #"Clash"
-        #"ARAM Clash"
-        #"ARURF"
-        #"URF"
-        #"One for All"
-        #"Nexus Blitz"
-        #"Ultimate Spellbook"
-        #"Arena"
-        #"Co-op vs AI Intro"
-        #"Co-op vs AI Beginner"
-        #"Co-op vs AI Intermediate"
-        #"TFT Normal"
-        #"TFT Ranked"
-        #"Swarm"
-    params = {"api_key" : riot_token, "count" : count, "start": start}
-    if queue_name:
-        queue_id = convert_queue_type_to_id(queue_name)
-        if queue_id:
-            params["queue"] = queue_id
     try:
-        response = requests.get(f"https://europe.api.riotgames.com/lol/match/v5/matches/by-puuid/{riot_id}/ids",params=params)
-        response.raise_for_status()
-    except requests.exceptions.Timeout:
-        logger.error(f"Timeout fetching matches for {riot_id}")
-        return []
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 429:
-            logger.warning("Rate limit hit")
-        logger.error(f"HTTP error: {e}")
-        return []
+        return await riot_client.get_match_record(match_id)
+    except asyncio.TimeoutError:
+        logger.error(f"Timeout fetching match record for {match_id}")
+        return None
     except Exception as e:
-        logger.error(f"Unexpected error in get_matches_by_player_id: {e}")
-        return []
-    
-    data = response.json()
-    return data
+        logger.error(f"Unexpected error in get_match_record_by_id: {e}")
+        return None
 
-def get_match_stats_by_id(match_id):
+async def iter_loses_data(riot_id, count = 5, queue_name = None):
     """
-    Returns a dict of match data based on a match ID.
+    Async generator behind `get_loses_data_list`, yielding after every match it fetches,
+    so callers can show progress or stop early (by breaking out of the loop).
+
+    Match IDs come from the player's locally synced match history, so only matches
+    newer than the last sync are listed from Riot.
+    Match details are fetched concurrently, at most `MATCH_FETCH_WINDOW` at a time,
+    and fetching stops as soon as enough losses have been found.
+
+    Args:
+        riot_id: Player's PUUID
+        count: Number of losses to retrieve (default: 5)
+        queue_name: Queue type filter (optional)
+
+    Yields:
+        The same progress dict every time, updated: {
+            "fetched": matches fetched so far,
+            "cache_hits": how many of those were already stored locally,
+            "losses": MatchRecords of the losses found so far, most recent first,
+            "new_loss": the loss found by this match, or None,
+            "done": True on the last yield
+        }
     """
-    try:
-        response = requests.get(f"https://europe.api.riotgames.com/lol/match/v5/matches/{match_id}", params={"api_key": riot_token})
-        response.raise_for_status()
-    except requests.exceptions.Timeout:
-        logger.error(f"Timeout fetching match stats for {match_id}")
-        return []
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 429:
-            logger.warning("Rate limit hit")
-        logger.error(f"HTTP error: {e}")
-        return []
-    except Exception as e:
-        logger.error(f"Unexpected error in get_match_stats_by_id: {e}")
-        return []
-    data = response.json()
-    return data 
+    progress = {"fetched": 0, "cache_hits": 0, "losses": [], "new_loss": None, "done": False}
+    queue_id = convert_queue_type_to_id(queue_name) if queue_name else None
+    matches_ids = await match_history.sync(riot_id, queue_id)
+    index = 0
+
+    while len(progress["losses"]) < count:
+        if index >= len(matches_ids):
+            # The known history ran out, go further back.
+            older_ids = await match_history.extend(riot_id, queue_id)
+            if not older_ids:
+                break
+            matches_ids += older_ids
+
+        while index < len(matches_ids) and len(progress["losses"]) < count:
+            # Never fetch more matches than the number of losses still missing.
+            window_size = min(MATCH_FETCH_WINDOW, count - len(progress["losses"]))
+            window = matches_ids[index:index + window_size]
+            index += window_size
+            cached = {match_id for match_id in window if match_id in riot_client.match_records or match_id in match_store}
+
+            async def fetch(position, match_id):
+                return position, match_id, await get_match_record_by_id(match_id=match_id)
 
-def get_loses_data_list(riot_id, count = 5, queue_name = None):
+            # Losses are kept in history order, whatever order the window completes in.
+            earlier_losses = progress["losses"]
+            window_losses = {}
+            tasks = [asyncio.ensure_future(fetch(position, match_id)) for position, match_id in enumerate(window)]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    position, match_id, match_data = await next_done
+                    progress["fetched"] += 1
+                    progress["cache_hits"] += match_id in cached
+                    progress["new_loss"] = None
+
+                    if not match_data:
+                        logger.info(f"Skipping match {match_id} - invalid or missing data")
+                    elif match_data.game_duration >= 300 and match_data.lost(riot_id):
+                        window_losses[position] = match_data
+                        progress["new_loss"] = match_data
+                        progress["losses"] = earlier_losses + [window_losses[i] for i in sorted(window_losses)]
+                    yield progress
+            finally:
+                # Only left running when the caller stopped early.
+                for task in tasks:
+                    task.cancel()
+
+    progress["new_loss"] = None
+    progress["done"] = True
+    yield progress
+
+async def get_loses_data_list(riot_id, count = 5, queue_name = None):
     """
-    Returns a list of full match data dicts for a player's recent loses.
+    Returns a list of match records (see match_records.py) for a player's recent loses.
+    See `iter_loses_data` for how they are fetched.
     
     Args:
         riot_id: Player's PUUID
@@ -186,53 +203,21 @@ def get_loses_data_list(riot_id, count = 5, queue_name = None):
         queue_id: Queue type filter (optional)
     
     Returns:
-        List of match data dictionaries
+        List of MatchRecord, most recent first
     """
-    loses = 0
-    loses_list = []
-    start_index = 0
-    
-    while loses < count:
-        matches_ids = get_matches_by_player_id(
-            riot_id=riot_id,
-            queue_name=queue_name,
-            count=count,
-            start=start_index
-        )
-        
-        if not matches_ids:
-            break
-            
-        for match_id in matches_ids:
-            if loses >= count:
-                break
-            match_data = get_match_stats_by_id(match_id=match_id)
-
-            if not match_data or "info" not in match_data:
-                logger.info(f"Skipping match {match_id} - invalid or missing data")
-                continue
-        
-
-            game_duration = match_data["info"]["gameDuration"]
-            if game_duration < 300:
-                continue
-            player_data = next((p for p in match_data["info"]["participants"] if p["puuid"] == riot_id), None)
-            if not player_data["win"]:
-                loses+=1
-                loses_list.append(match_data)
-        
-        # Move to the next batch of matches
-        start_index += len(matches_ids)
-
-    return loses_list
+    async for progress in iter_loses_data(riot_id, count, queue_name):
+        pass
+    return progress["losses"]
             
-def get_match_int_scores_list(match_data_list, player_pool):
+def get_match_int_scores_list(match_data_list, player_pool, player_puuids=None):
     """
     Returns a list of dicts containing int scores for players across multiple matches.
 
     Args:
-        match_data_list: List of match data dictionaries
+        match_data_list: List of match records (or match data dictionaries)
         player_pool: List of player names to calculate INT scores for
+        player_puuids: Optional dict of PUUID -> registered name. When given, players are matched
+                       by PUUID and reported under their registered name, so Riot name changes don't matter.
 
     Returns:
         list: List of dicts, where each dict contains INT scores for that match.
@@ -243,11 +228,17 @@ def get_match_int_scores_list(match_data_list, player_pool):
         [{"PlayerA": 890, "PlayerB": 426}, {"PlayerA": 752, "PlayerB": 381}]
     """
     match_scores_list = []
+    match_data_list = [as_match_record(match_data) for match_data in match_data_list]
+    player_pool = set(player_pool)
 
-    for match_data in match_data_list:
-        int_scores = calculate_int_scores(match_data)
-        filtered_scores = {player: score for player, score in int_scores.items() 
-                          if player in player_pool}
+    for match_data, int_scores in zip(match_data_list, int_score_cache.get_scores(match_data_list)):
+        if player_puuids:
+            filtered_scores = {player_puuids[loser.puuid]: int_scores[loser.name]
+                               for loser in match_data.losers
+                               if loser.puuid in player_puuids and loser.name in int_scores}
+        else:
+            filtered_scores = {player: score for player, score in int_scores.items() 
+                              if player in player_pool}
         if filtered_scores:
             match_scores_list.append(filtered_scores) 
     
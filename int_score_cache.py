@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import threading
+from match_records import as_match_record
+from match_score_calculator import MODEL_VERSION, calculate_int_scores_batch
+logger = logging.getLogger('discord.int_score_cache')
+
+
+class IntScoreCache:
+    """
+    Persisted cache of INT score breakdowns, keyed by match ID and INT model version.
+
+    INT scores only depend on the (immutable) match payload and the model constants,
+    so every match is scored once per model version. Overlapping `!blame` windows then
+    skip scoring entirely.
+
+    The file is append-only JSON lines: a header line holding the model version,
+    then one `{"match_id": ..., "scores": {...}}` line per scored match.
+    When the model version in the header doesn't match `MODEL_VERSION`, the file is
+    started over, so changing the model constants invalidates every cached score.
+
+    Scoring runs off the event loop (in `asyncio.to_thread`), so the cache is guarded by a thread lock.
+    """
+    def __init__(self, filepath: str = 'data/intScores.jsonl', model_version: str = MODEL_VERSION):
+        self.filepath = filepath
+        self.model_version = model_version
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        self.scores = self._load_db()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _load_db(self):
+        """Internal helper to load the cached scores of the current model version."""
+        scores = {}
+        try:
+            with open(self.filepath, 'r', encoding="utf8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("model_version") != self.model_version:
+                    logger.info(f"INT model changed ({header.get('model_version')} -> {self.model_version}), dropping cached scores")
+                    self._reset_db()
+                    return {}
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A write cut short by a crash, the match is simply scored again.
+                        continue
+                    scores[entry["match_id"]] = entry["scores"]
+        except FileNotFoundError:
+            self._reset_db()
+        except json.JSONDecodeError:
+            logger.warning(f"Unreadable INT score cache header in {self.filepath}, starting over")
+            self._reset_db()
+        logger.info(f"Loaded {len(scores)} cached INT scores (model {self.model_version})")
+        return scores
+
+    def _reset_db(self) -> None:
+        temp_path = f"{self.filepath}.tmp"
+        with open(temp_path, 'w', encoding="utf8") as f:
+            f.write(json.dumps({"model_version": self.model_version}) + "\n")
+        os.replace(temp_path, self.filepath)
+
+    def _append_db(self, entries) -> None:
+        with open(self.filepath, 'a', encoding="utf8") as f:
+            for match_id, scores in entries:
+                f.write(json.dumps({"match_id": match_id, "scores": scores}, separators=(",", ":")) + "\n")
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def get_breakdowns(self, match_jsons):
+        """
+        Returns the INT score breakdown of every match, like `calculate_int_scores_batch(..., breakdown=True)`.
+        Only matches that aren't cached yet are scored, in one batch, and then cached.
+        Results are shared with the cache, so callers must not mutate them.
+        """
+        records = [as_match_record(match_json) for match_json in match_jsons]
+        results = [None] * len(records)
+        missing = []
+        with self._lock:
+            for i, record in enumerate(records):
+                cached = self.scores.get(record.match_id)
+                if cached is not None:
+                    results[i] = cached
+                else:
+                    missing.append(i)
+            self.hits += len(records) - len(missing)
+            self.misses += len(missing)
+
+        if not missing:
+            return results
+
+        new_entries = []
+        for i, scores in zip(missing, calculate_int_scores_batch([records[i] for i in missing], breakdown=True)):
+            results[i] = scores
+            if records[i].match_id:
+                new_entries.append((records[i].match_id, scores))
+
+        with self._lock:
+            new_entries = [(match_id, scores) for match_id, scores in new_entries if match_id not in self.scores]
+            for match_id, scores in new_entries:
+                self.scores[match_id] = scores
+            if new_entries:
+                try:
+                    self._append_db(new_entries)
+                except OSError as e:
+                    logger.error(f"Failed to persist INT scores: {e}")
+        logger.debug(f"Scored {len(missing)} matches, {len(records) - len(missing)} served from cache")
+        return results
+
+    def get_scores(self, match_jsons):
+        """Same as `get_breakdowns`, but maps every player to their INT score only, like `calculate_int_scores_batch`."""
+        return [
+            {name: breakdown["int_score"] for name, breakdown in breakdowns.items()}
+            for breakdowns in self.get_breakdowns(match_jsons)
+        ]
+
+
+int_score_cache = IntScoreCache()
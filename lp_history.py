@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import os
+import struct
+import time
+from bisect import bisect_left, bisect_right
+logger = logging.getLogger('discord.lp_history')
+
+SPARKLINE_BARS = "▁▂▃▄▅▆▇█"
+
+
+class LPHistoryStore:
+    """
+    Append-only LP time series, one small binary file per PUUID under `directory`.
+
+    Every sample is a fixed 12 byte record of (timestamp, total_lp, wins, losses), where
+    total_lp is the flattened rank from `rank_to_lp`. A sample is only written when one of
+    its values changed since the last one, so a player costs ~12 bytes per game played,
+    and months of history for the whole pool fit in a few kilobytes.
+
+    A player's series is read from disk once, then kept in memory (sorted by timestamp)
+    so range queries are binary searches and never touch the Riot API.
+    """
+    RECORD = struct.Struct("<IiHH")
+    SUFFIX = ".lph"
+
+    def __init__(self, directory: str = 'data/lpHistory'):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self._series = {}
+        self._lock = asyncio.Lock()
+
+    def _path(self, puuid: str) -> str:
+        return os.path.join(self.directory, f"{puuid}{self.SUFFIX}")
+
+    def _load(self, puuid: str):
+        """Returns a player's (timestamps, samples), reading them from disk the first time."""
+        if puuid in self._series:
+            return self._series[puuid]
+        timestamps, samples = [], []
+        try:
+            with open(self._path(puuid), "rb") as f:
+                data = f.read()
+            # A torn last record (crash mid-write) is ignored.
+            usable = len(data) - len(data) % self.RECORD.size
+            for sample in self.RECORD.iter_unpack(data[:usable]):
+                timestamps.append(sample[0])
+                samples.append(sample)
+        except FileNotFoundError:
+            pass
+        self._series[puuid] = (timestamps, samples)
+        return self._series[puuid]
+
+    def _write(self, puuid: str, sample) -> None:
+        with open(self._path(puuid), "ab") as f:
+            f.write(self.RECORD.pack(*sample))
+
+    async def append(self, puuid: str, total_lp: int, wins: int, losses: int, timestamp: int = None) -> bool:
+        """
+        Records a sample of a player's ranked state, unless nothing changed since the last one.
+
+        Returns:
+            bool: True if a sample was written.
+        """
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        async with self._lock:
+            timestamps, samples = self._load(puuid)
+            if samples and samples[-1][1:] == (total_lp, wins, losses):
+                return False
+            if timestamps and timestamp < timestamps[-1]:
+                logger.warning(f"Ignoring out of order LP sample for {puuid}")
+                return False
+            sample = (timestamp, total_lp, wins, losses)
+            try:
+                await asyncio.to_thread(self._write, puuid, sample)
+            except (OSError, struct.error) as e:
+                logger.error(f"Failed to store LP sample for {puuid}: {e}")
+                return False
+            timestamps.append(timestamp)
+            samples.append(sample)
+            return True
+
+    def get_range(self, puuid: str, start: int, end: int = None):
+        """Returns the (timestamp, total_lp, wins, losses) samples taken between `start` and `end` (epoch seconds)."""
+        timestamps, samples = self._load(puuid)
+        low = bisect_left(timestamps, start)
+        high = bisect_right(timestamps, end) if end is not None else len(samples)
+        return samples[low:high]
+
+    def get_at(self, puuid: str, timestamp: int):
+        """Returns the sample in effect at `timestamp` (the last one taken at or before it), or None."""
+        timestamps, samples = self._load(puuid)
+        index = bisect_right(timestamps, timestamp)
+        return samples[index - 1] if index else None
+
+    def get_latest(self, puuid: str):
+        _, samples = self._load(puuid)
+        return samples[-1] if samples else None
+
+    def get_delta(self, puuid: str, seconds: int, now: int = None):
+        """
+        LP gained (or lost, if negative) over the last `seconds`.
+        For series younger than that, counts from the first sample. None without samples.
+        """
+        now = int(now if now is not None else time.time())
+        latest = self.get_latest(puuid)
+        if latest is None:
+            return None
+        baseline = self.get_at(puuid, now - seconds) or self._load(puuid)[1][0]
+        return latest[1] - baseline[1]
+
+    def get_sparkline(self, puuid: str, seconds: int, width: int = 8, now: int = None) -> str:
+        """
+        A `width` character sparkline of the LP over the last `seconds`, one bar per time bucket
+        (the LP in effect at the end of the bucket). Empty if the player has no samples in that span.
+        """
+        now = int(now if now is not None else time.time())
+        start = now - seconds
+        if not self.get_range(puuid, start) and self.get_at(puuid, start) is None:
+            return ""
+
+        points = []
+        for i in range(1, width + 1):
+            sample = self.get_at(puuid, start + seconds * i // width)
+            if sample is not None:
+                points.append(sample[1])
+        if not points:
+            return ""
+        low, high = min(points), max(points)
+        if low == high:
+            return SPARKLINE_BARS[len(SPARKLINE_BARS) // 2] * len(points)
+        scale = (len(SPARKLINE_BARS) - 1) / (high - low)
+        return "".join(SPARKLINE_BARS[round((point - low) * scale)] for point in points)
+
+
+lp_history = LPHistoryStore()
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from match_store import match_store
+from riot_api import riot_client
+from singleflight import SingleFlight
+logger = logging.getLogger('discord.match_history')
+
+# Riot returns at most this many match IDs per list call.
+MATCH_ID_PAGE_SIZE = 100
+# No game lasts longer than this, used as a safety margin when the newest match's start time is unknown.
+MAX_GAME_LENGTH = 2 * 60 * 60
+
+
+class MatchHistoryStore:
+    """
+    Locally persisted match ID history, per player and per queue.
+
+    Each history is kept newest first, along with a high-water mark (newest known match ID
+    and its start time). Syncing only asks Riot for matches started since that mark,
+    so keeping a history up to date costs one small list call.
+
+    The file looks like:
+        {puuid: {queue: {"ids": [...], "newest_id": "EUN1_...", "newest_timestamp": 1767225600}}}
+    """
+    def __init__(self, filepath: str = 'data/matchHistory.json'):
+        self.filepath = filepath
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        self.histories = self._load_db()
+        self.in_flight = SingleFlight("match_history")
+        self._file_lock = asyncio.Lock()
+
+    def _load_db(self):
+        """Internal helper to load data from disk safely."""
+        try:
+            with open(self.filepath, 'r', encoding="utf8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_db(self, data) -> None:
+        temp_path = f"{self.filepath}.tmp"
+        with open(temp_path, 'w', encoding="utf8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.filepath)
+
+    async def _save_db(self) -> None:
+        """Saves every history to disk, off the event loop."""
+        snapshot = json.loads(json.dumps(self.histories))
+        async with self._file_lock:
+            await asyncio.to_thread(self._write_db, snapshot)
+
+    @staticmethod
+    def _queue_key(queue_id) -> str:
+        return str(queue_id) if queue_id else "all"
+
+    def _get_state(self, puuid: str, queue_id):
+        return self.histories.get(puuid, {}).get(self._queue_key(queue_id))
+
+    def get_ids(self, puuid: str, queue_id=None):
+        """Returns the locally known match IDs of a player, newest first. Makes no API calls."""
+        state = self._get_state(puuid, queue_id)
+        return list(state["ids"]) if state else []
+
+    async def sync(self, puuid: str, queue_id=None):
+        """
+        Fetches the match IDs newer than the high-water mark and merges them into the history.
+        Concurrent syncs of the same history share one call.
+
+        Returns:
+            The full known history, newest first.
+        """
+        await self.in_flight.do((puuid, self._queue_key(queue_id)), lambda: self._sync(puuid, queue_id))
+        return self.get_ids(puuid, queue_id)
+
+    async def _sync(self, puuid: str, queue_id) -> None:
+        state = self._get_state(puuid, queue_id)
+        synced_at = int(time.time())
+
+        if not state or not state["ids"]:
+            # First sync, or a player with no games yet: one page is plenty, older IDs are fetched with `extend`.
+            new_ids = await riot_client.get_match_history(puuid, MATCH_ID_PAGE_SIZE, queue=queue_id)
+            if new_ids is None:
+                return
+            state = {"ids": [], "newest_id": None, "newest_timestamp": None}
+        else:
+            new_ids = []
+            start = 0
+            while True:
+                page = await riot_client.get_match_history(
+                    puuid, MATCH_ID_PAGE_SIZE, queue=queue_id, start=start, start_time=state["newest_timestamp"]
+                )
+                if page is None:
+                    return
+                new_ids.extend(page)
+                if len(page) < MATCH_ID_PAGE_SIZE:
+                    break
+                start += len(page)
+
+        known = set(state["ids"])
+        new_ids = [match_id for match_id in new_ids if match_id not in known]
+        if not new_ids and state["ids"]:
+            return
+
+        state["ids"] = new_ids + state["ids"]
+        if state["ids"]:
+            state["newest_id"] = state["ids"][0]
+            state["newest_timestamp"] = await self._get_start_timestamp(state["newest_id"], synced_at)
+        self.histories.setdefault(puuid, {})[self._queue_key(queue_id)] = state
+        logger.info(f"Synced {len(new_ids)} new matches for {puuid} (queue {self._queue_key(queue_id)})")
+        await self._save_db()
+
+    async def _get_start_timestamp(self, match_id: str, synced_at: int) -> int:
+        """
+        Start time (epoch seconds) of a match, used as the `startTime` of the next sync.
+        Read from the match store when the match is there, otherwise falls back to a safe estimate.
+        """
+        match_data = await match_store.load(match_id)
+        if match_data and "gameStartTimestamp" in match_data.get("info", {}):
+            return match_data["info"]["gameStartTimestamp"] // 1000
+        return synced_at - MAX_GAME_LENGTH
+
+    async def extend(self, puuid: str, queue_id=None, count: int = MATCH_ID_PAGE_SIZE):
+        """
+        Fetches up to `count` match IDs older than the oldest known one, for requests
+        that go further back than the history does.
+
+        Returns:
+            The newly added, older match IDs (newest first).
+        """
+        state = self._get_state(puuid, queue_id)
+        if not state:
+            await self.sync(puuid, queue_id)
+            return self.get_ids(puuid, queue_id)
+
+        # The history always mirrors the newest part of Riot's list, so its length is the next page's start.
+        older_ids = await riot_client.get_match_history(
+            puuid, min(count, MATCH_ID_PAGE_SIZE), queue=queue_id, start=len(state["ids"])
+        )
+        if not older_ids:
+            return []
+        known = set(state["ids"])
+        older_ids = [match_id for match_id in older_ids if match_id not in known]
+        state["ids"].extend(older_ids)
+        await self._save_db()
+        return older_ids
+
+
+match_history = MatchHistoryStore()
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from config import MATCH_RECORD_CACHE_SIZE
+
+
+class ParticipantRecord:
+    """
+    The fields of a match-v5 participant the bot actually reads.
+    A full participant carries ~250 stats and challenges, this keeps about fifteen.
+    """
+    __slots__ = (
+        "puuid", "name", "tag", "champion", "team_id", "team_position", "win",
+        "kills", "deaths", "assists", "vision_score", "gold_earned",
+        "vision_per_minute", "gold_per_minute", "damage_per_minute", "kill_participation"
+    )
+
+    def __init__(self, participant: dict):
+        challenges = participant.get("challenges", {})
+        self.puuid = participant["puuid"]
+        self.name = participant.get("riotIdGameName")
+        self.tag = participant.get("riotIdTagline")
+        self.champion = participant.get("championName")
+        self.team_id = participant.get("teamId")
+        self.team_position = participant.get("teamPosition", "")
+        self.win = participant["win"]
+        self.kills = participant["kills"]
+        self.deaths = participant["deaths"]
+        self.assists = participant["assists"]
+        self.vision_score = participant.get("visionScore", 0)
+        self.gold_earned = participant.get("goldEarned", 0)
+        self.vision_per_minute = challenges.get("visionScorePerMinute", 0.0)
+        self.gold_per_minute = challenges.get("goldPerMinute", 0.0)
+        self.damage_per_minute = challenges.get("damagePerMinute", 0.0)
+        self.kill_participation = challenges.get("killParticipation", 0.0)
+
+    def __repr__(self):
+        return f"ParticipantRecord({self.name}, {self.team_position or '-'}, {'win' if self.win else 'loss'})"
+
+
+class MatchRecord:
+    """
+    Compact, read-only view of a match-v5 payload: the match fields the bot uses,
+    its participants as `ParticipantRecord`s, and indexes built once on creation:
+    participants by PUUID and by name, and grouped by team and by result.
+
+    A full payload is ~100 KB in memory, a record a few KB, so records are what
+    the pipelines pass around and what stays cached in memory.
+    The full payload stays in the match store on disk.
+    """
+    __slots__ = (
+        "match_id", "queue_id", "game_duration", "game_start_timestamp",
+        "participants", "teams", "winners", "losers", "_by_puuid", "_by_name"
+    )
+
+    def __init__(self, match_json: dict):
+        info = match_json["info"]
+        self.match_id = match_json.get("metadata", {}).get("matchId")
+        self.queue_id = info.get("queueId")
+        self.game_duration = info["gameDuration"]
+        self.game_start_timestamp = info.get("gameStartTimestamp")
+        self.participants = tuple(ParticipantRecord(participant) for participant in info["participants"])
+        self._by_puuid = {participant.puuid: participant for participant in self.participants}
+        self._by_name = {participant.name: participant for participant in self.participants}
+
+        teams = {}
+        for participant in self.participants:
+            teams.setdefault(participant.team_id, []).append(participant)
+        self.teams = {team_id: tuple(members) for team_id, members in teams.items()}
+        self.winners = tuple(participant for participant in self.participants if participant.win)
+        self.losers = tuple(participant for participant in self.participants if not participant.win)
+
+    def get_participant(self, puuid: str):
+        """Returns the participant with this PUUID, or None if they weren't in the match."""
+        return self._by_puuid.get(puuid)
+
+    def get_participant_by_name(self, name: str):
+        """
+        Returns the participant with this Riot name, or None.
+        Names change over time, prefer `get_participant` when the PUUID is known.
+        """
+        return self._by_name.get(name)
+
+    def get_team(self, puuid: str):
+        """Returns every participant on the same team as `puuid` (them included), or an empty tuple."""
+        participant = self._by_puuid.get(puuid)
+        if participant is None:
+            return ()
+        return self.teams[participant.team_id]
+
+    def lost(self, puuid: str) -> bool:
+        """True if `puuid` played this match and lost it."""
+        participant = self._by_puuid.get(puuid)
+        return participant is not None and not participant.win
+
+    def __repr__(self):
+        return f"MatchRecord({self.match_id}, queue={self.queue_id}, {len(self.participants)} participants)"
+
+
+def as_match_record(match):
+    """Returns `match` as a `MatchRecord`, converting full match-v5 payloads."""
+    if isinstance(match, MatchRecord):
+        return match
+    return MatchRecord(match)
+
+
+class MatchRecordCache:
+    """
+    In-memory LRU cache of `MatchRecord`s, keyed by match ID.
+    Keeps the `max_size` most recently used matches, at a few KB each.
+    """
+    def __init__(self, max_size: int = MATCH_RECORD_CACHE_SIZE):
+        self.max_size = max_size
+        self._records = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, match_id: str) -> bool:
+        return match_id in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, match_id: str):
+        """Returns the cached record of a match, or None."""
+        record = self._records.get(match_id)
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._records.move_to_end(match_id)
+        return record
+
+    def put(self, record: MatchRecord) -> None:
+        self._records[record.match_id] = record
+        self._records.move_to_end(record.match_id)
+        while len(self._records) > self.max_size:
+            self._records.popitem(last=False)
@@ -2,6 +2,10 @@ import requests
 from dotenv import load_dotenv
 import os
 import logging
+import hashlib
+import json
+import numpy as np
+from match_records import as_match_record
 
 load_dotenv()
 riot_token = os.getenv("RIOT_KEY")
@@ -10,7 +14,71 @@ riot_token = os.getenv("RIOT_KEY")
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
-def calculate_int_scores(match_json,match_log_json=None, target_player=None):
+# INT model constants, as (baseline, harshness) per metric and team position.
+# A metric at its baseline scores 500, and the harshness controls how fast the score moves away from it.
+# Positions missing from a metric use its "default" entry.
+INT_MODEL = {
+    "kda": {
+        "default": (2, 2.8)
+    },
+    "vision": {
+        "UTILITY": (1.6, 3.2),
+        "default": (0.5, 1.2)
+    },
+    "gold": {
+        "UTILITY": (385, 2.4),
+        "default": (420, 3.2)
+    },
+    "damage": {
+        "UTILITY": (470, 2.2),
+        "JUNGLE": (650, 2.8),
+        "default": (800, 3.4)
+    },
+    "kill_participation": {
+        "UTILITY": (47, 3.4),
+        "JUNGLE": (47, 3.4),
+        "default": (47, 2.8)
+    }
+}
+INT_METRICS = list(INT_MODEL)
+# Bump when the scoring formula changes, so scores cached by an older model are dropped.
+# Changes to INT_MODEL are picked up on their own.
+MODEL_REVISION = 1
+
+# Row of every position in the batch tables. Anything else (e.g. "" in ARAM) uses the last row.
+POSITION_INDEX = {"TOP": 0, "JUNGLE": 1, "MIDDLE": 2, "BOTTOM": 3, "UTILITY": 4}
+OTHER_POSITION_INDEX = len(POSITION_INDEX)
+
+
+def get_model_constants(metric, team_position):
+    """Returns the (baseline, harshness) of an INT metric for a team position."""
+    table = INT_MODEL[metric]
+    return table.get(team_position, table["default"])
+
+
+def _build_position_tables():
+    """Builds (metric x position) baseline and harshness arrays from INT_MODEL, for batch scoring."""
+    positions = list(POSITION_INDEX) + [None]
+    baselines = np.empty((len(INT_METRICS), len(positions)))
+    harshness = np.empty((len(INT_METRICS), len(positions)))
+    for m, metric in enumerate(INT_METRICS):
+        for p, position in enumerate(positions):
+            baselines[m, p], harshness[m, p] = get_model_constants(metric, position)
+    return baselines, harshness
+
+
+BASELINE_TABLE, HARSHNESS_TABLE = _build_position_tables()
+
+
+def get_model_version():
+    """Returns a short hash of the INT model (formula revision and constants), used to key cached scores."""
+    model = json.dumps({"revision": MODEL_REVISION, "model": INT_MODEL}, sort_keys=True)
+    return hashlib.sha256(model.encode("utf8")).hexdigest()[:12]
+
+
+MODEL_VERSION = get_model_version()
+
+def calculate_int_scores(match_json,match_log_json=None, target_player=None, target_puuid=None):
     """
     Calculate "INT scores" for players in a League of Legends match to identify underperformers.
     
@@ -24,10 +92,13 @@ def calculate_int_scores(match_json,match_log_json=None, target_player=None):
     Higher INT scores indicate worse performance relative to expectations.
     
     Args:
-        match_json (dict): Full match data from Riot API (v5/matches/{matchId})
-        match_log_json (dict, optional): Match timeline data (currently unused). Defaults to None.
+        match_json (MatchRecord or dict): Match record, or full match data from Riot API (v5/matches/{matchId})
+        match_log_json (TimelineSummary, optional): Compact match timeline (see match_timelines.py), from
+                                      `riot_client.get_timeline_summary`. Not used by the current model. Defaults to None.
         target_player (str, optional): Only calculate scores if this player lost. 
                                       If provided and player won, returns empty dict. Defaults to None.
+        target_puuid (str, optional): Same as `target_player`, but by PUUID, which survives name changes.
+                                      Defaults to None.
     
     Returns:
         dict: Player names mapped to their INT scores (float). Only includes players who lost.
@@ -64,95 +135,134 @@ def calculate_int_scores(match_json,match_log_json=None, target_player=None):
         - Score of ~500 represents average/baseline performance
     """
     
-    participants = match_json["info"]["participants"]
+    match = as_match_record(match_json)
     int_scores = {}
-    game_duration_seconds = match_json["info"]["gameDuration"]
-    #print(f"The game lasted {game_duration_seconds} seconds")
+    if target_puuid and not match.lost(target_puuid):
+        return {}
     if target_player:
-        target_lost = any(p["riotIdGameName"] == target_player and not p["win"] for p in participants)
-        if not target_lost:
+        target = match.get_participant_by_name(target_player)
+        if not target or target.win:
             return {}
-    for participant in participants:
-        int_score = 0
-        if participant["win"] == False:
-            name = participant["riotIdGameName"]
-            kills = participant["kills"]
-            deaths = participant["deaths"]
-            assists = participant["assists"]
-            team_position = participant["teamPosition"]
-
-            if deaths == 0:
-                kda = kills+assists
-            else:
-                kda = (kills+assists)/deaths
-
-            kda_baseline = 2
-            kda_harshness = 2.8
-            kda_int_score = int( 1000 / (1 + (kda / kda_baseline)**kda_harshness) )
-            
-           # print(f"Detected player {participant["riotIdGameName"]} had a kda of {kda}, indie pos ={indiviual_position}, team pos = {team_position}")
-
-            vision = participant["visionScore"]
-            vision_per_min = participant["challenges"]["visionScorePerMinute"]
-            gold = participant["goldEarned"]
-            gold_per_minute = participant["challenges"]["goldPerMinute"]            
-
-            #VISION & GOLD INT VALUE
-            if team_position == "UTILITY":
-                vision_per_min_baseline = 1.6
-                vision_per_min_harshness = 3.2
-
-                gold_per_minute_baseline = 385
-                gold_per_minute_harshness = 2.4
-
-            else:
-                vision_per_min_baseline = 0.5
-                vision_per_min_harshness = 1.2
-
-                gold_per_minute_baseline = 420
-                gold_per_minute_harshness = 3.2
-            
-
-            vision_int_score = int(1000/(1+(vision_per_min/vision_per_min_baseline)**vision_per_min_harshness))
-            gold_int_score = int(1000/(1+(gold_per_minute/gold_per_minute_baseline)**gold_per_minute_harshness))
-
-            #DAMAGE INT VALUE
-            damage_per_minute = participant["challenges"]["damagePerMinute"]
-            if team_position == "UTILITY":
-                damage_per_minute_baseline = 470
-                damage_per_minute_harshness = 2.2
-            elif team_position == "JUNGLE":
-                damage_per_minute_baseline = 650
-                damage_per_minute_harshness = 2.8
-            else:
-                damage_per_minute_baseline = 800
-                damage_per_minute_harshness = 3.4
-
-            damage_int_score = int(1000/(1+(damage_per_minute/damage_per_minute_baseline)**damage_per_minute_harshness))
-
-
-            #KP INT VALUE
-            kill_participation = round(participant["challenges"]["killParticipation"]*100,2)
-            
-            kill_participation_baseline = 47
-            if team_position in ["UTILITY","JUNGLE"]:
-                kill_participation_harshness = 3.4
-            else:
-                kill_participation_harshness = 2.8
-
-            kill_participation_score = int(1000/(1+(kill_participation/kill_participation_baseline)**kill_participation_harshness))
-
-            int_score = (kda_int_score + vision_int_score + gold_int_score + damage_int_score+kill_participation_score)/5
-            
-            # Log the blame score breakdown
-            logger.info(f"{name} ({team_position}): INT={int_score:.1f} | KDA={kda_int_score} Vision={vision_int_score} Gold={gold_int_score} Damage={damage_int_score} KP={kill_participation_score}")
-            
-            int_scores[name] = int_score
+    for participant in match.losers:
+        name = participant.name
+        kills = participant.kills
+        deaths = participant.deaths
+        assists = participant.assists
+        team_position = participant.team_position
+
+        if deaths == 0:
+            kda = kills+assists
+        else:
+            kda = (kills+assists)/deaths
+
+        kda_baseline, kda_harshness = get_model_constants("kda", team_position)
+        kda_int_score = int( 1000 / (1 + (kda / kda_baseline)**kda_harshness) )
+
+        vision_per_min = participant.vision_per_minute
+        gold_per_minute = participant.gold_per_minute
+
+        #VISION & GOLD INT VALUE
+        vision_per_min_baseline, vision_per_min_harshness = get_model_constants("vision", team_position)
+        gold_per_minute_baseline, gold_per_minute_harshness = get_model_constants("gold", team_position)
+
+        vision_int_score = int(1000/(1+(vision_per_min/vision_per_min_baseline)**vision_per_min_harshness))
+        gold_int_score = int(1000/(1+(gold_per_minute/gold_per_minute_baseline)**gold_per_minute_harshness))
+
+        #DAMAGE INT VALUE
+        damage_per_minute = participant.damage_per_minute
+        damage_per_minute_baseline, damage_per_minute_harshness = get_model_constants("damage", team_position)
+
+        damage_int_score = int(1000/(1+(damage_per_minute/damage_per_minute_baseline)**damage_per_minute_harshness))
+
+
+        #KP INT VALUE
+        kill_participation = round(participant.kill_participation*100,2)
+        
+        kill_participation_baseline, kill_participation_harshness = get_model_constants("kill_participation", team_position)
+
+        kill_participation_score = int(1000/(1+(kill_participation/kill_participation_baseline)**kill_participation_harshness))
+
+        int_score = (kda_int_score + vision_int_score + gold_int_score + damage_int_score+kill_participation_score)/5
+        
+        # Log the blame score breakdown
+        logger.info(f"{name} ({team_position}): INT={int_score:.1f} | KDA={kda_int_score} Vision={vision_int_score} Gold={gold_int_score} Damage={damage_int_score} KP={kill_participation_score}")
+        
+        int_scores[name] = int_score
   
     return int_scores
 
 
+def calculate_int_scores_batch(match_jsons, breakdown=False):
+    """
+    Calculate INT scores for many matches at once.
+
+    Gives the same scores as calling `calculate_int_scores` on every match, but every losing
+    participant of every match is scored in a single NumPy pass: the five sub-scores are computed
+    as arrays, with baselines and harshness values looked up per position from
+    `BASELINE_TABLE` and `HARSHNESS_TABLE`.
+
+    Args:
+        match_jsons (list): Match records, or full match data dicts from Riot API (v5/matches/{matchId})
+        breakdown (bool, optional): Also return every sub-score. Defaults to False.
+
+    Returns:
+        list: One dict per match, mapping the names of the players who lost to their INT score.
+              With `breakdown`, each player maps to a dict holding "int_score" and one
+              sub-score per metric of `INT_METRICS`.
+
+    Examples:
+        >>> calculate_int_scores_batch([match_one, match_two])
+        [{'Peafowl': 456.78, 'yoyo15': 892.34, ...}, {'Dani': 678.9, ...}]
+
+        >>> calculate_int_scores_batch([match_one], breakdown=True)
+        [{'Peafowl': {'int_score': 456.78, 'kda': 412, 'vision': 380, 'gold': 501, 'damage': 455, 'kill_participation': 536}, ...}]
+    """
+    match_indexes = []
+    names = []
+    positions = []
+    metric_values = []
+    for match_index, match_json in enumerate(match_jsons):
+        for participant in as_match_record(match_json).losers:
+            kills, deaths, assists = participant.kills, participant.deaths, participant.assists
+            match_indexes.append(match_index)
+            names.append(participant.name)
+            positions.append(POSITION_INDEX.get(participant.team_position, OTHER_POSITION_INDEX))
+            metric_values.append((
+                (kills + assists) / deaths if deaths else kills + assists,
+                participant.vision_per_minute,
+                participant.gold_per_minute,
+                participant.damage_per_minute,
+                round(participant.kill_participation * 100, 2)
+            ))
+
+    results = [{} for _ in match_jsons]
+    if not names:
+        return results
+
+    # (metric x player) arrays, with each player's baselines picked from their position's column.
+    values = np.array(metric_values, dtype=np.float64).T
+    position_columns = np.array(positions)
+    baselines = BASELINE_TABLE[:, position_columns]
+    harshness = HARSHNESS_TABLE[:, position_columns]
+
+    sub_scores = np.trunc(1000 / (1 + (values / baselines) ** harshness))
+    int_scores = sub_scores.sum(axis=0) / len(INT_METRICS)
+
+    if breakdown:
+        for match_index, name, int_score, player_sub_scores in zip(match_indexes, names, int_scores.tolist(), sub_scores.T.tolist()):
+            player_breakdown = {"int_score": int_score}
+            for metric, sub_score in zip(INT_METRICS, player_sub_scores):
+                player_breakdown[metric] = int(sub_score)
+            results[match_index][name] = player_breakdown
+    else:
+        for match_index, name, int_score in zip(match_indexes, names, int_scores.tolist()):
+            results[match_index][name] = int_score
+    logger.debug(f"Batch scored {len(names)} players across {len(match_jsons)} matches")
+    return results
+
+
 #purpose : 
+# (per-minute gold/xp/cs and objective participation for these come from TimelineSummary, see match_timelines.py)
 # top : tower damage and damage
 # jg : kp and objectives
 # mid : damage and kp
@@ -160,4 +270,10 @@ def calculate_int_scores(match_json,match_log_json=None, target_player=None):
 # support : kp and vision
 
 if __name__ == "__main__":
-    calculate_int_scores("o","i")
\ No newline at end of file
+    # Prints the INT score breakdown of a saved match-v5 payload.
+    import sys
+    if len(sys.argv) != 2:
+        print("Usage: python match_score_calculator.py <match.json>")
+        sys.exit(1)
+    with open(sys.argv[1], "r", encoding="utf8") as file:
+        calculate_int_scores(json.load(file))
\ No newline at end of file
@@ -0,0 +1,90 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+logger = logging.getLogger('discord.match_store')
+
+
+class MatchStore:
+    """
+    Local store for finished match-v5 payloads.
+
+    Finished matches never change, so each one is written once as gzipped JSON
+    under `directory/<match_id>.json.gz`. A match shared by several registered
+    players (flex games) is therefore only stored and fetched once.
+    The set of stored IDs is indexed in memory on startup, so lookups never touch the disk
+    unless the match is actually there.
+    Other per-match data (e.g. timeline summaries) is stored the same way, in its own directory.
+    """
+    SUFFIX = ".json.gz"
+
+    def __init__(self, directory: str = 'data/matches', kind: str = "match"):
+        self.directory = directory
+        self.kind = kind
+        os.makedirs(self.directory, exist_ok=True)
+        self._index = {
+            filename[:-len(self.SUFFIX)]
+            for filename in os.listdir(self.directory)
+            if filename.endswith(self.SUFFIX)
+        }
+        self.hits = 0
+        self.misses = 0
+        logger.info(f"{kind.capitalize()} store indexed {len(self._index)} matches")
+
+    def _path(self, match_id: str) -> str:
+        return os.path.join(self.directory, f"{match_id}{self.SUFFIX}")
+
+    def __contains__(self, match_id: str) -> bool:
+        return match_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, match_id: str):
+        """Returns the stored match payload, or None if it isn't stored."""
+        if match_id not in self._index:
+            self.misses += 1
+            return None
+        try:
+            with gzip.open(self._path(match_id), "rt", encoding="utf8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Dropping unreadable stored {self.kind} {match_id}: {e}")
+            self._index.discard(match_id)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, match_id: str, data: dict) -> None:
+        """Stores a match payload. Already stored matches are left untouched."""
+        if match_id in self._index:
+            return
+        path = self._path(match_id)
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp_path, path)
+        self._index.add(match_id)
+
+    async def load(self, match_id: str):
+        """Async version of `get`, reading off the event loop."""
+        if match_id not in self._index:
+            self.misses += 1
+            return None
+        return await asyncio.to_thread(self.get, match_id)
+
+    async def save(self, match_id: str, data: dict) -> None:
+        """Async version of `put`, writing off the event loop."""
+        if match_id in self._index:
+            return
+        try:
+            await asyncio.to_thread(self.put, match_id, data)
+        except OSError as e:
+            logger.error(f"Failed to store {self.kind} {match_id}: {e}")
+
+
+match_store = MatchStore()
+# Compact timeline summaries (see match_timelines.py), stored next to the matches they belong to.
+timeline_store = MatchStore('data/timelines', kind="timeline")
@@ -0,0 +1,148 @@
+from bisect import bisect_right
+
+# Timeline events kept in summaries, everything else (wards, items, skill ups, kills...) is dropped.
+OBJECTIVE_EVENTS = ("ELITE_MONSTER_KILL", "BUILDING_KILL")
+# Per-minute stats kept for every participant.
+TIMELINE_STATS = ("gold", "xp", "cs", "level")
+
+
+def summarize_timeline(timeline_json: dict) -> dict:
+    """
+    Reduces a match-v5 timeline (often several MB) to the few KB future INT model terms need.
+
+    Returns:
+        dict: {
+            "match_id": the match ID,
+            "frame_interval": seconds between samples (60),
+            "participants": {puuid: {"participant_id", "team_id", "gold", "xp", "cs", "level"}},
+                with one value per frame (per minute, starting at 0:00) in every stat list,
+            "objectives": [{"time": seconds, "type", "subtype", "team_id", "killer_id", "assists"}],
+                elite monsters and buildings, in game order. `team_id` is the team that took it.
+        }
+    """
+    info = timeline_json["info"]
+    frames = info.get("frames", [])
+    participant_ids = {}
+    for participant in info.get("participants", []):
+        participant_ids[participant["participantId"]] = participant["puuid"]
+    if not participant_ids:
+        # Older timelines only list PUUIDs in the metadata, in participant ID order.
+        participant_ids = {i + 1: puuid for i, puuid in enumerate(timeline_json.get("metadata", {}).get("participants", []))}
+
+    participants = {}
+    for participant_id, puuid in participant_ids.items():
+        # Riot numbers participants 1-5 on the blue side (100) and 6-10 on the red side (200).
+        summary = {"participant_id": participant_id, "team_id": 100 if participant_id <= 5 else 200}
+        for stat in TIMELINE_STATS:
+            summary[stat] = []
+        participants[puuid] = summary
+
+    objectives = []
+    for frame in frames:
+        participant_frames = frame.get("participantFrames", {})
+        for participant_id, puuid in participant_ids.items():
+            participant_frame = participant_frames.get(str(participant_id), {})
+            summary = participants[puuid]
+            summary["gold"].append(participant_frame.get("totalGold", 0))
+            summary["xp"].append(participant_frame.get("xp", 0))
+            summary["cs"].append(participant_frame.get("minionsKilled", 0) + participant_frame.get("jungleMinionsKilled", 0))
+            summary["level"].append(participant_frame.get("level", 1))
+
+        for event in frame.get("events", []):
+            if event.get("type") not in OBJECTIVE_EVENTS:
+                continue
+            if event["type"] == "ELITE_MONSTER_KILL":
+                objective_type = event.get("monsterType")
+                subtype = event.get("monsterSubType")
+                team_id = event.get("killerTeamId")
+            else:
+                objective_type = event.get("buildingType")
+                subtype = event.get("towerType") or event.get("laneType")
+                # For buildings, teamId is the team that lost it.
+                team_id = 300 - event["teamId"] if event.get("teamId") in (100, 200) else None
+            objectives.append({
+                "time": event.get("timestamp", 0) // 1000,
+                "type": objective_type,
+                "subtype": subtype,
+                "team_id": team_id,
+                "killer_id": event.get("killerId", 0),
+                "assists": event.get("assistingParticipantIds", [])
+            })
+
+    return {
+        "match_id": timeline_json.get("metadata", {}).get("matchId"),
+        "frame_interval": info.get("frameInterval", 60000) // 1000,
+        "participants": participants,
+        "objectives": objectives
+    }
+
+
+class TimelineSummary:
+    """
+    Read-only view of a timeline summary (see `summarize_timeline`), with the lookups
+    INT model terms need: a stat at a given minute, differences between two players, and
+    objective participation.
+    """
+    __slots__ = ("match_id", "frame_interval", "participants", "objectives", "_objective_times")
+
+    def __init__(self, summary: dict):
+        self.match_id = summary.get("match_id")
+        self.frame_interval = summary.get("frame_interval", 60)
+        self.participants = summary["participants"]
+        self.objectives = summary["objectives"]
+        self._objective_times = [objective["time"] for objective in self.objectives]
+
+    def get_series(self, puuid: str, stat: str):
+        """Returns a player's per-minute values of `stat` (gold, xp, cs or level), or an empty list."""
+        participant = self.participants.get(puuid)
+        return participant[stat] if participant else []
+
+    def get_at(self, puuid: str, stat: str, minute: int):
+        """
+        A player's `stat` at `minute`, or None if they weren't in the match.
+        Games that ended earlier return their last value.
+        """
+        series = self.get_series(puuid, stat)
+        if not series:
+            return None
+        index = minute * 60 // self.frame_interval
+        return series[min(index, len(series) - 1)]
+
+    def get_diff_at(self, puuid: str, opponent_puuid: str, stat: str, minute: int):
+        """`stat` lead of a player over another (e.g. their lane opponent) at `minute`, or None."""
+        value = self.get_at(puuid, stat, minute)
+        opponent_value = self.get_at(opponent_puuid, stat, minute)
+        if value is None or opponent_value is None:
+            return None
+        return value - opponent_value
+
+    def get_objectives(self, team_id: int = None, until: int = None):
+        """Objectives taken (by `team_id`, if given) up to `until` seconds into the game (if given)."""
+        objectives = self.objectives if until is None else self.objectives[:bisect_right(self._objective_times, until)]
+        if team_id is None:
+            return list(objectives)
+        return [objective for objective in objectives if objective["team_id"] == team_id]
+
+    def get_objective_participation(self, puuid: str, types=None) -> float:
+        """
+        Share (0-1) of their team's objectives a player killed or assisted on.
+        `types` limits it to some objective types (e.g. ("DRAGON", "BARON_NASHOR")). 0 without any.
+        """
+        participant = self.participants.get(puuid)
+        if participant is None:
+            return 0.0
+        team_objectives = [
+            objective for objective in self.get_objectives(participant["team_id"])
+            if types is None or objective["type"] in types
+        ]
+        if not team_objectives:
+            return 0.0
+        participant_id = participant["participant_id"]
+        involved = sum(
+            1 for objective in team_objectives
+            if objective["killer_id"] == participant_id or participant_id in objective["assists"]
+        )
+        return involved / len(team_objectives)
+
+    def __repr__(self):
+        return f"TimelineSummary({self.match_id}, {len(self.participants)} participants, {len(self.objectives)} objectives)"
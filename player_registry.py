@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from riot_api import riot_client
+logger = logging.getLogger('discord.player_registry')
+
+
+class RegistrationError(ValueError):
+    """Raised when a registration conflicts with an existing one."""
+
+
+def riot_id_key(riot_name: str, riot_tag: str) -> str:
+    return f"{riot_name.lower()}#{riot_tag.lower()}"
+
+
+class PlayerRegistry:
+    """
+    The players registered with `!register`, loaded from `filepath` once and kept in memory.
+
+    Players are indexed by Discord name, PUUID and Riot ID (name#tag, case insensitive),
+    so every lookup is a dict access. Changes are made under an async lock, applied in memory
+    right away, then written behind: one background task writes the whole registry
+    (temp file + rename, so the file is never half written), and changes made while it runs
+    are folded into its next write.
+
+    Each player looks like:
+        {"riot_name": "Name", "riot_tag": "EUNE", "riot_id": puuid, "platform": "eun1", "region": "europe"}
+    Returned players are shared with the registry, so they must not be mutated.
+    """
+    def __init__(self, filepath: str = 'data/players.json'):
+        self.filepath = filepath
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        # Set when a corrupt file couldn't be moved aside, so it is never overwritten.
+        self._read_only = False
+        self._players = self._load_db()
+        self._by_puuid = {}
+        self._by_riot_id = {}
+        for discord_name, player in self._players.items():
+            self._index(discord_name, player)
+        self._lock = asyncio.Lock()
+        self._file_lock = asyncio.Lock()
+        self._dirty = False
+        self._flush_task = None
+        logger.info(f"Loaded {len(self._players)} registered players")
+
+    def _load_db(self):
+        """Internal helper to load data from disk safely."""
+        try:
+            with open(self.filepath, 'r', encoding="utf8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            self._write_db({})
+            logger.warning(f"Created missing {self.filepath} file")
+            return {}
+        except json.JSONDecodeError as e:
+            logger.error(f"Error loading player pool: {e}")
+            # Keep the corrupt file for manual recovery instead of letting the next write replace it.
+            corrupt_path = f"{self.filepath}.corrupt-{int(time.time())}"
+            try:
+                os.replace(self.filepath, corrupt_path)
+                logger.error(f"Moved the corrupt player pool to {corrupt_path}, starting with an empty registry")
+            except OSError as move_error:
+                logger.error(f"Couldn't move the corrupt player pool aside ({move_error}), registry changes won't be saved")
+                self._read_only = True
+            return {}
+
+    def _write_db(self, data) -> None:
+        temp_path = f"{self.filepath}.tmp"
+        with open(temp_path, 'w', encoding="utf8") as f:
+            json.dump(data, f, indent=4)
+        os.replace(temp_path, self.filepath)
+
+    def _index(self, discord_name: str, player) -> None:
+        if player.get("riot_id"):
+            self._by_puuid[player["riot_id"]] = discord_name
+            riot_client.remember_route(player["riot_id"], player.get("platform"))
+        self._by_riot_id[riot_id_key(player["riot_name"], player["riot_tag"])] = discord_name
+
+    def _unindex(self, player) -> None:
+        self._by_puuid.pop(player.get("riot_id"), None)
+        self._by_riot_id.pop(riot_id_key(player["riot_name"], player["riot_tag"]), None)
+
+    def _schedule_flush(self) -> None:
+        """Marks the registry as changed and makes sure a write is coming."""
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        if self._read_only:
+            logger.warning(f"Not saving the player registry over the corrupt {self.filepath}")
+            return
+        while self._dirty:
+            self._dirty = False
+            snapshot = json.loads(json.dumps(self._players))
+            try:
+                async with self._file_lock:
+                    await asyncio.to_thread(self._write_db, snapshot)
+            except OSError as e:
+                logger.error(f"Failed to save the player registry: {e}", exc_info=True)
+                self._dirty = True
+                return
+
+    async def flush(self) -> None:
+        """Waits until every change so far is on disk."""
+        while self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        if self._dirty and not self._read_only:
+            await self._flush()
+
+    def __contains__(self, discord_name: str) -> bool:
+        return discord_name in self._players
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def get(self, discord_name: str):
+        """Returns a registered player by Discord name, or None."""
+        return self._players.get(discord_name)
+
+    def get_by_puuid(self, puuid: str):
+        """Returns the (discord_name, player) registered with a PUUID, or None."""
+        discord_name = self._by_puuid.get(puuid)
+        return (discord_name, self._players[discord_name]) if discord_name is not None else None
+
+    def get_by_riot_id(self, riot_name: str, riot_tag: str):
+        """Returns the (discord_name, player) registered with a Riot ID, or None."""
+        discord_name = self._by_riot_id.get(riot_id_key(riot_name, riot_tag))
+        return (discord_name, self._players[discord_name]) if discord_name is not None else None
+
+    def get_all(self):
+        """Returns every registered player, as {discord_name: player}. The dict is a copy, safe to iterate across awaits."""
+        return dict(self._players)
+
+    def get_riot_names(self):
+        return [player["riot_name"] for player in self._players.values()]
+
+    def get_puuid_names(self):
+        """Returns {puuid: riot_name} of every registered player."""
+        return {puuid: self._players[discord_name]["riot_name"] for puuid, discord_name in self._by_puuid.items()}
+
+    def _check_conflicts(self, discord_name: str, player) -> None:
+        if discord_name in self._players:
+            raise RegistrationError(f"{discord_name} is already registered")
+        if player.get("riot_id") in self._by_puuid:
+            raise RegistrationError(f"this Riot account is already registered to {self._by_puuid[player['riot_id']]}")
+
+    async def add(self, discord_name: str, player) -> None:
+        """
+        Registers a player.
+
+        Raises:
+            RegistrationError: if the Discord name or the Riot account is already registered.
+        """
+        async with self._lock:
+            self._check_conflicts(discord_name, player)
+            self._players[discord_name] = player
+            self._index(discord_name, player)
+            self._schedule_flush()
+
+    async def add_many(self, registrations):
+        """
+        Registers several players at once, with a single write to disk.
+
+        Args:
+            registrations: iterable of (discord_name, player)
+
+        Returns:
+            dict: {discord_name: None if registered, or the RegistrationError that prevented it}
+        """
+        results = {}
+        async with self._lock:
+            for discord_name, player in registrations:
+                try:
+                    self._check_conflicts(discord_name, player)
+                except RegistrationError as e:
+                    results[discord_name] = e
+                    continue
+                self._players[discord_name] = player
+                self._index(discord_name, player)
+                results[discord_name] = None
+            if any(error is None for error in results.values()):
+                self._schedule_flush()
+        return results
+
+    async def update(self, discord_name: str, **fields) -> None:
+        """Updates fields of a registered player (e.g. their platform)."""
+        async with self._lock:
+            player = self._players[discord_name]
+            self._unindex(player)
+            player = dict(player, **fields)
+            self._players[discord_name] = player
+            self._index(discord_name, player)
+            self._schedule_flush()
+
+    async def remove(self, discord_name: str):
+        """Unregisters a player. Returns the removed player, or None if they weren't registered."""
+        async with self._lock:
+            player = self._players.pop(discord_name, None)
+            if player is None:
+                return None
+            self._unindex(player)
+            self._schedule_flush()
+            return player
+
+
+player_registry = PlayerRegistry()
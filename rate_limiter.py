@@ -0,0 +1,230 @@
+import asyncio
+import contextvars
+import logging
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from config import RIOT_BACKGROUND_BUDGET_SHARE
+logger = logging.getLogger('discord.rate_limiter')
+
+# Personal/development key limits, used until Riot tells us the real ones.
+DEFAULT_APP_RATE_LIMIT = "20:1,100:120"
+
+# Priority lanes, highest priority first.
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+_current_lane = contextvars.ContextVar("riot_request_lane", default=INTERACTIVE)
+
+
+@contextmanager
+def request_lane(lane: str):
+    """
+    Runs every Riot request made inside the block in `lane`.
+    Tasks started inside the block (e.g. with asyncio.gather) inherit the lane.
+
+    Example:
+        >>> with request_lane(BACKGROUND):
+        ...     await riot_client.get_match_details(match_id)
+    """
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def parse_rate_limit_header(header: str):
+    """
+    Parses a Riot rate limit header into (value, seconds) pairs.
+
+    Example:
+        >>> parse_rate_limit_header("20:1,100:120")
+        [(20, 1), (100, 120)]
+    """
+    pairs = []
+    for part in header.split(","):
+        value, seconds = part.strip().split(":")
+        pairs.append((int(value), int(seconds)))
+    return pairs
+
+
+class RateLimitWindow:
+    """
+    One Riot rate limit window, e.g. 100 requests every 120 seconds.
+    Keeps the send time of every request still inside the window.
+    """
+    def __init__(self, limit: int, seconds: int):
+        self.limit = limit
+        self.seconds = seconds
+        self.sent = deque()
+
+    def _prune(self, now: float) -> None:
+        while self.sent and self.sent[0] <= now - self.seconds:
+            self.sent.popleft()
+
+    def wait_time(self, now: float, share: float = 1.0) -> float:
+        """Seconds until one more request fits in `share` of this window."""
+        self._prune(now)
+        limit = max(1, int(self.limit * share))
+        if len(self.sent) < limit:
+            return 0
+        return self.sent[len(self.sent) - limit] + self.seconds - now
+
+    def record(self, now: float) -> None:
+        self.sent.append(now)
+
+    def sync(self, count: int, now: float) -> None:
+        """
+        Catches up with the count Riot reports for this window.
+        Requests we didn't see (another process, or a restart) are counted as sent just now.
+        """
+        self._prune(now)
+        for _ in range(count - len(self.sent)):
+            self.sent.append(now)
+
+
+class RiotRateLimiter:
+    """
+    Paces Riot API requests so they stay under the application and method rate limits.
+
+    The limits are read from the `X-App-Rate-Limit` and `X-Method-Rate-Limit` headers
+    of every response and the windows are kept in step with the matching `-Count` headers,
+    so requests go out as fast as the key allows without hitting 429s.
+    Riot enforces its limits per routing host, so the Riot client keeps one limiter per host.
+
+    Requests are split in priority lanes. Interactive requests (commands) always go first,
+    while background requests wait for them and may only use `background_share` of each window,
+    so a user command never queues behind background work.
+    """
+    # Background requests re-check this often while interactive requests are queued.
+    DEFER_INTERVAL = 0.1
+
+    def __init__(self, app_limits: str = DEFAULT_APP_RATE_LIMIT, background_share: float = RIOT_BACKGROUND_BUDGET_SHARE):
+        self.app_windows = self._build_windows(app_limits)
+        self.method_windows = {}
+        self.blocked_until = 0
+        self.background_share = background_share
+        self.lane_stats = {
+            lane: {"waiting": 0, "served": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for lane in LANES
+        }
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _build_windows(header: str, previous=None):
+        """Builds windows from a limit header, keeping the history of windows that didn't change."""
+        previous = {window.seconds: window for window in previous or []}
+        windows = []
+        for limit, seconds in parse_rate_limit_header(header):
+            window = previous.get(seconds) or RateLimitWindow(limit, seconds)
+            window.limit = limit
+            windows.append(window)
+        return windows
+
+    def _windows_for(self, method: str):
+        return self.app_windows + self.method_windows.get(method, [])
+
+    async def acquire(self, method: str, lane: str = None) -> None:
+        """
+        Waits until a request to `method` fits in every window, then reserves it.
+        The lane defaults to the one set with `request_lane`, or interactive.
+        """
+        lane = lane or _current_lane.get()
+        stats = self.lane_stats[lane]
+        share = 1.0 if lane == INTERACTIVE else self.background_share
+        started = time.monotonic()
+        stats["waiting"] += 1
+        try:
+            while True:
+                async with self._lock:
+                    now = time.monotonic()
+                    wait = self.blocked_until - now
+                    for window in self._windows_for(method):
+                        wait = max(wait, window.wait_time(now, share))
+                    if lane != INTERACTIVE and self.lane_stats[INTERACTIVE]["waiting"]:
+                        wait = max(wait, self.DEFER_INTERVAL)
+                    if wait <= 0:
+                        for window in self._windows_for(method):
+                            window.record(now)
+                        waited = now - started
+                        stats["served"] += 1
+                        stats["total_wait"] += waited
+                        stats["max_wait"] = max(stats["max_wait"], waited)
+                        return
+                await asyncio.sleep(wait)
+        finally:
+            stats["waiting"] -= 1
+
+    def update(self, method: str, headers) -> None:
+        """Updates limits and counts from the headers of a Riot response."""
+        now = time.monotonic()
+        try:
+            app_limit = headers.get("X-App-Rate-Limit")
+            if app_limit:
+                self.app_windows = self._build_windows(app_limit, self.app_windows)
+            method_limit = headers.get("X-Method-Rate-Limit")
+            if method_limit:
+                self.method_windows[method] = self._build_windows(method_limit, self.method_windows.get(method))
+
+            for header, windows in (
+                ("X-App-Rate-Limit-Count", self.app_windows),
+                ("X-Method-Rate-Limit-Count", self.method_windows.get(method, []))
+            ):
+                counts = headers.get(header)
+                if not counts:
+                    continue
+                by_seconds = {window.seconds: window for window in windows}
+                for count, seconds in parse_rate_limit_header(counts):
+                    if seconds in by_seconds:
+                        by_seconds[seconds].sync(count, now)
+        except ValueError as e:
+            logger.warning(f"Could not parse rate limit headers for {method}: {e}")
+
+    def block(self, seconds: float) -> None:
+        """Holds every request back for `seconds`, after Riot answered with a 429."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def headroom(self, method: str = None) -> float:
+        """Fraction (0-1) of the tightest window that is still free right now."""
+        now = time.monotonic()
+        windows = self.app_windows + (self.method_windows.get(method, []) if method else [])
+        if not windows:
+            return 1.0
+        free = []
+        for window in windows:
+            window._prune(now)
+            free.append(1 - len(window.sent) / window.limit)
+        return max(0.0, min(free))
+
+    def estimate_wait(self, calls: int, method: str = None, lane: str = INTERACTIVE) -> float:
+        """
+        Rough number of seconds the limiter would hold `calls` more requests back, given how full
+        every window is right now. Ignores other traffic to come, so it's a lower bound when busy.
+        """
+        now = time.monotonic()
+        share = 1.0 if lane == INTERACTIVE else self.background_share
+        wait = max(0.0, self.blocked_until - now)
+        for window in self._windows_for(method) if method else self.app_windows:
+            window._prune(now)
+            limit = max(1, int(window.limit * share))
+            free = max(0, limit - len(window.sent))
+            if calls > free:
+                wait = max(wait, math.ceil((calls - free) / limit) * window.seconds)
+        return wait
+
+    def get_lane_metrics(self):
+        """Returns queue depth and wait times of every lane."""
+        metrics = {}
+        for lane, stats in self.lane_stats.items():
+            served = stats["served"]
+            metrics[lane] = {
+                "waiting": stats["waiting"],
+                "served": served,
+                "avg_wait": stats["total_wait"] / served if served else 0.0,
+                "max_wait": stats["max_wait"]
+            }
+        return metrics
+
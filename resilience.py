@@ -0,0 +1,182 @@
+import logging
+import random
+import threading
+import time
+from config import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_SECONDS,
+    NEGATIVE_CACHE_TTL,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY
+)
+logger = logging.getLogger('discord.resilience')
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream host whose circuit breaker is open."""
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} is unavailable, retrying in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `failure_threshold` failures in a row (errors, timeouts, 5xx), the breaker opens and
+    every call to the host fails fast for `reset_seconds`. Then a single trial call is let
+    through (half-open): success closes the breaker, failure opens it again. A trial that ends
+    without either (a 429, a cancelled task, a bad payload...) must be handed back with
+    `release_trial`, so the next call can try instead.
+    Thread safe, so blocking clients running in worker threads can share it.
+    """
+    def __init__(self, host: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a trial call through."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def before_call(self) -> bool:
+        """
+        Checks that a call may go out.
+
+        Returns:
+            bool: True if the call is the half-open trial, which the caller must release
+            (see `release_trial`) once it is done.
+
+        Raises:
+            CircuitOpenError: while the breaker is open, or while its trial call is in flight.
+        """
+        with self._lock:
+            if self.state == OPEN and not self.retry_in():
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+                logger.info(f"Circuit breaker for {self.host} is half-open, trying one call")
+            if self.state == OPEN or (self.state == HALF_OPEN and self._trial_in_flight):
+                self.rejected += 1
+                raise CircuitOpenError(self.host, self.retry_in())
+            if self.state == HALF_OPEN:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release_trial(self) -> None:
+        """
+        Frees the trial slot of a half-open breaker when the trial call ended without an outcome.
+        Does nothing once the trial was recorded as a success or a failure.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit breaker for {self.host} closed")
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, error=None) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) if error is not None else None
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+                logger.warning(f"Circuit breaker for {self.host} opened after {self.failures} failures: {self.last_error}")
+
+    def get_status(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": self.retry_in(),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "last_error": self.last_error
+        }
+
+
+class NegativeCache:
+    """
+    Remembers requests that came back 404 for `ttl` seconds, so unknown Riot IDs,
+    matches or Pokemon aren't looked up again on every command.
+    """
+    def __init__(self, ttl: float = NEGATIVE_CACHE_TTL):
+        self.ttl = ttl
+        self._expires = {}
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            expires = self._expires.get(key)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._expires[key]
+                return False
+            self.hits += 1
+            return True
+
+    def add(self, key) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._expires[key] = now + self.ttl
+            # Expired entries are dropped as new ones come in, so the cache never grows unbounded.
+            for stale_key in [k for k, expires in self._expires.items() if expires <= now]:
+                del self._expires[stale_key]
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0 based): exponential backoff with full jitter,
+    so clients that failed together don't all retry at the same moment.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def is_retryable_status(status: int) -> bool:
+    """True for responses worth retrying: rate limited or an upstream server error."""
+    return status == 429 or status >= 500
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    """Returns the circuit breaker of an upstream host, shared by every client calling it."""
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+def get_breaker_statuses():
+    """Returns {host: status} for every upstream host called so far."""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {host: breaker.get_status() for host, breaker in sorted(breakers.items())}
@@ -0,0 +1,314 @@
+import aiohttp
+import asyncio
+import logging
+import os
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+from config import (
+    API_MAX_RETRIES,
+    API_REQUEST_TIMEOUT,
+    DEFAULT_PLATFORM,
+    RIOT_CONNECTIONS_PER_HOST,
+    RIOT_DNS_CACHE_TTL,
+    RIOT_KEEPALIVE_TIMEOUT
+)
+from match_records import MatchRecord, MatchRecordCache
+from match_store import match_store, timeline_store
+from match_timelines import TimelineSummary, summarize_timeline
+from rate_limiter import RiotRateLimiter
+from resilience import CircuitOpenError, NegativeCache, backoff_delay, get_breaker, is_retryable_status
+from riot_routing import get_account_region, get_host, get_match_platform, get_region, guess_platform
+from singleflight import SingleFlight
+logger = logging.getLogger('discord.riot_api')
+
+load_dotenv()
+riot_token = os.getenv("RIOT_KEY")
+
+
+class RiotAPIClient:
+    """
+    Riot API manager.
+
+    Riot rate limits are enforced per routing host (eun1, europe, na1...), so every host gets
+    its own rate limiter and its own pooled session: a slow or throttled region never holds
+    back requests to another one.
+    Requests about a player are routed with the platform remembered for their PUUID
+    (see `remember_route`), and match requests with the platform in the match ID.
+    """
+    def __init__(self, token):
+        self.token = token
+        self.headers = {"X-Riot-Token": self.token}
+        self.puuid_cache = {}
+        # PUUID -> platform routing value, e.g. "eun1".
+        self.routes = {}
+        self.rate_limiters = {}
+        self.sessions = {}
+        # Host -> event loop its session was opened on.
+        self.session_loops = {}
+        self.in_flight = SingleFlight("riot")
+        self.not_found = NegativeCache()
+        self.match_records = MatchRecordCache()
+
+    def _get_session(self, host):
+        """
+        Returns the pooled session of a Riot host, opening it on the running loop if needed.
+        Connections are kept alive and DNS lookups cached, so repeated calls to
+        the same host skip the TCP and TLS handshakes.
+
+        Sessions are bound to the loop they were opened on, so one opened on another loop
+        (e.g. the one cogs are loaded on, closed before the bot starts) is replaced.
+        """
+        loop = asyncio.get_running_loop()
+        session = self.sessions.get(host)
+        if session and not session.closed and self.session_loops.get(host) is loop:
+            return session
+        if session and not session.closed:
+            logger.warning(f"Dropping the Riot API session of {host}, opened on another event loop")
+        connector = aiohttp.TCPConnector(
+            limit=RIOT_CONNECTIONS_PER_HOST,
+            limit_per_host=RIOT_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=RIOT_DNS_CACHE_TTL,
+            keepalive_timeout=RIOT_KEEPALIVE_TIMEOUT
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=API_REQUEST_TIMEOUT)
+        )
+        self.sessions[host] = session
+        self.session_loops[host] = loop
+        logger.info(f"Riot API session opened for {host}")
+        return session
+
+    async def close(self):
+        """Closes every pooled HTTP session opened on the running loop. Called once, when the bot shuts down."""
+        loop = asyncio.get_running_loop()
+        for host, session in self.sessions.items():
+            if not session.closed and self.session_loops.get(host) is loop:
+                await session.close()
+                logger.info(f"Riot API session closed for {host}")
+        self.sessions = {}
+        self.session_loops = {}
+
+    def get_rate_limiter(self, host):
+        """Returns the rate limiter of a Riot host, e.g. 'europe.api.riotgames.com'."""
+        if host not in self.rate_limiters:
+            self.rate_limiters[host] = RiotRateLimiter()
+        return self.rate_limiters[host]
+
+    def remember_route(self, puuid, platform):
+        """Routes later requests about `puuid` to `platform` (e.g. 'euw1'). Ignored when platform is empty."""
+        if puuid and platform:
+            self.routes[puuid] = platform.lower()
+
+    def get_platform(self, puuid):
+        return self.routes.get(puuid, DEFAULT_PLATFORM)
+
+    async def request(self, url, method, params=None):
+        """
+        Generic async request wrapper with Rate Limit handling.
+        Concurrent identical requests share a single call to Riot.
+
+        Failed calls (429s, 5xx, timeouts) are retried at most `API_MAX_RETRIES` times, with
+        jittered backoff. 404s are remembered for `NEGATIVE_CACHE_TTL` seconds, and while a
+        host's circuit breaker is open its requests fail fast without touching the network.
+
+        Args:
+            url: full Riot API URL
+            method: name of the Riot API method, used to track its own rate limit
+            params: query parameters (optional)
+
+        Returns:
+            The decoded JSON, or None if the request failed, 404'd or its host is unavailable.
+        """
+        key = (url, tuple(sorted((params or {}).items())))
+        if key in self.not_found:
+            return None
+        return await self.in_flight.do(key, lambda: self._request(url, method, params, key))
+
+    async def _request(self, url, method, params=None, key=None):
+        host = urlsplit(url).hostname
+        rate_limiter = self.get_rate_limiter(host)
+        breaker = get_breaker(host)
+        # Opened lazily, on the loop the request runs on.
+        session = self._get_session(host)
+        for attempt in range(API_MAX_RETRIES + 1):
+            try:
+                is_trial = breaker.before_call()
+            except CircuitOpenError as e:
+                logger.warning(f"Skipping {method}: {e}")
+                return None
+
+            try:
+                await rate_limiter.acquire(method)
+                async with session.get(url, params=params) as response:
+                    rate_limiter.update(method, response.headers)
+                    if response.status == 200:
+                        data = await response.json()
+                        breaker.record_success()
+                        return data
+
+                    if not is_retryable_status(response.status):
+                        # The host answered, the request itself is wrong or points at nothing.
+                        breaker.record_success()
+                        if response.status == 404:
+                            self.not_found.add(key)
+                        logger.error(f"API Error {response.status}: {url}")
+                        return None
+
+                    if response.status == 429:
+                        # Application and method limits come with Retry-After, Riot's own service limits may not.
+                        retry_after = response.headers.get("Retry-After")
+                        delay = int(retry_after) if retry_after else backoff_delay(attempt)
+                        rate_limiter.block(delay)
+                        logger.warning(f"Rate limited on {method} ({host}). Retrying in {delay:.1f}s.")
+                        continue
+
+                    breaker.record_failure(f"HTTP {response.status}")
+                    error = f"API Error {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                breaker.record_failure(repr(e))
+                error = repr(e)
+            finally:
+                # A trial that got rate limited, cancelled or a bad payload hands its slot back.
+                if is_trial:
+                    breaker.release_trial()
+
+            if attempt < API_MAX_RETRIES:
+                delay = backoff_delay(attempt)
+                logger.warning(f"{error} on {method} ({host}), retry {attempt + 1}/{API_MAX_RETRIES} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        logger.error(f"Giving up on {method} after {API_MAX_RETRIES + 1} attempts: {url}")
+        return None
+
+    async def get_account(self, name, tag, region=None):
+        """Returns the Riot account (puuid, gameName, tagLine) for a Riot ID, or None."""
+        region = region or get_account_region(guess_platform(tag))
+        url = f"https://{get_host(region)}/riot/account/v1/accounts/by-riot-id/{name}/{tag}"
+        return await self.request(url, "account-v1.by-riot-id")
+
+    async def get_active_platform(self, puuid, region=None):
+        """Returns the platform (e.g. 'euw1') a player plays League on, or None."""
+        region = region or get_account_region(self.get_platform(puuid))
+        url = f"https://{get_host(region)}/riot/account/v1/region/by-game/lol/by-puuid/{puuid}"
+        data = await self.request(url, "account-v1.region-by-game")
+        return data.get("region") if data else None
+
+    async def resolve_account(self, name, tag):
+        """
+        Looks up a Riot ID and the platform its player is on, for registration.
+        The platform is remembered, so the player's later requests go to the right hosts.
+
+        Returns:
+            dict: the Riot account, plus "platform" and "region" routing values, or None if not found.
+        """
+        data = await self.get_account(name, tag)
+        if not data:
+            return None
+        guessed_platform = guess_platform(data.get("tagLine", tag))
+        platform = await self.get_active_platform(data["puuid"], get_account_region(guessed_platform)) or guessed_platform
+        self.remember_route(data["puuid"], platform)
+        return dict(data, platform=platform, region=get_region(platform))
+
+    async def get_puuid(self, name, tag):
+        cache_key = f"{name.lower()}#{tag.lower()}"
+        if cache_key in self.puuid_cache:
+            return self.puuid_cache[cache_key]
+
+        data = await self.get_account(name, tag)
+
+        if data:
+            self.puuid_cache[cache_key] = data.get("puuid")
+            return data.get("puuid")
+        return None
+
+    async def get_ranked_data(self, puuid, platform=None):
+        platform = platform or self.get_platform(puuid)
+        url = f"https://{get_host(platform)}/lol/league/v4/entries/by-puuid/{puuid}"
+        return await self.request(url, "league-v4.entries-by-puuid")
+
+    async def get_match_history(self, puuid, count, region=None, queue=420, start=0, start_time=None):
+        """
+        Lists match IDs of a player, newest first.
+        `start_time` (epoch seconds) only keeps matches that started at or after it.
+        """
+        region = region or get_region(self.get_platform(puuid))
+        url = f"https://{get_host(region)}/lol/match/v5/matches/by-puuid/{puuid}/ids"
+        params = {"count": count, "start": start}
+        if queue:
+            params["queue"] = queue
+        if start_time:
+            params["startTime"] = start_time
+        return await self.request(url, "match-v5.ids-by-puuid", params=params)
+
+    async def get_match_details(self, match_id, region=None):
+        """
+        Reads through the local match store, so a finished match is only ever fetched once.
+        Routed to the region of the platform in the match ID, unless `region` is given.
+        """
+        return await self.in_flight.do(("match", match_id), lambda: self._get_match_details(match_id, region))
+
+    async def _get_match_details(self, match_id, region):
+        stored = await match_store.load(match_id)
+        if stored:
+            return stored
+
+        region = region or get_region(get_match_platform(match_id))
+        url = f"https://{get_host(region)}/lol/match/v5/matches/{match_id}"
+        data = await self.request(url, "match-v5.match")
+        if data and "info" in data:
+            await match_store.save(match_id, data)
+        return data
+
+    async def get_match_record(self, match_id, region=None):
+        """
+        Returns a match as a compact `MatchRecord`, or None if it can't be fetched.
+        Records stay cached in memory, the full payload is only read (store first, then Riot) on a miss.
+        """
+        record = self.match_records.get(match_id)
+        if record is not None:
+            return record
+        data = await self.get_match_details(match_id, region)
+        if not data or "info" not in data:
+            return None
+        try:
+            record = MatchRecord(data)
+        except KeyError as e:
+            logger.warning(f"Match {match_id} is missing field {e}")
+            return None
+        record.match_id = record.match_id or match_id
+        self.match_records.put(record)
+        return record
+
+    async def get_match_timeline(self, match_id, region=None):
+        """Returns the full match-v5 timeline of a match (several MB), or None. Prefer `get_timeline_summary`."""
+        region = region or get_region(get_match_platform(match_id))
+        url = f"https://{get_host(region)}/lol/match/v5/matches/{match_id}/timeline"
+        return await self.request(url, "match-v5.timeline")
+
+    async def get_timeline_summary(self, match_id, region=None):
+        """
+        Returns the compact `TimelineSummary` of a match, or None if its timeline can't be fetched.
+        The full timeline is fetched and summarized once, then only the summary is kept, in the timeline store.
+        """
+        return await self.in_flight.do(("timeline", match_id), lambda: self._get_timeline_summary(match_id, region))
+
+    async def _get_timeline_summary(self, match_id, region):
+        summary = await timeline_store.load(match_id)
+        if summary is None:
+            data = await self.get_match_timeline(match_id, region)
+            if not data or "info" not in data:
+                return None
+            try:
+                summary = await asyncio.to_thread(summarize_timeline, data)
+            except (KeyError, TypeError) as e:
+                logger.warning(f"Timeline of {match_id} is missing field {e}")
+                return None
+            summary["match_id"] = summary["match_id"] or match_id
+            await timeline_store.save(match_id, summary)
+        return TimelineSummary(summary)
+
+
+# Shared client, so every cog and helper draws from the same connection pools and rate limit budgets.
+riot_client = RiotAPIClient(riot_token)
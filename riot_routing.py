@@ -0,0 +1,71 @@
+from config import DEFAULT_PLATFORM
+
+# Platform routing value (league-v4, summoner-v4...) -> regional routing value (match-v5).
+PLATFORM_REGIONS = {
+    "eun1": "europe",
+    "euw1": "europe",
+    "tr1": "europe",
+    "ru": "europe",
+    "me1": "europe",
+    "na1": "americas",
+    "br1": "americas",
+    "la1": "americas",
+    "la2": "americas",
+    "kr": "asia",
+    "jp1": "asia",
+    "oc1": "sea",
+    "sg2": "sea",
+    "tw2": "sea",
+    "vn2": "sea",
+}
+
+# Default Riot ID taglines, used as a hint before a player's platform is known.
+TAG_PLATFORMS = {
+    "eune": "eun1",
+    "euw": "euw1",
+    "tr1": "tr1",
+    "ru1": "ru",
+    "me1": "me1",
+    "na1": "na1",
+    "br1": "br1",
+    "lan": "la1",
+    "las": "la2",
+    "kr1": "kr",
+    "jp1": "jp1",
+    "oce": "oc1",
+    "sg2": "sg2",
+    "tw2": "tw2",
+    "vn2": "vn2",
+}
+
+
+def get_region(platform: str) -> str:
+    """Returns the regional routing value (e.g. 'europe') serving a platform (e.g. 'eun1')."""
+    return PLATFORM_REGIONS.get(platform.lower(), PLATFORM_REGIONS[DEFAULT_PLATFORM])
+
+
+def get_account_region(platform: str) -> str:
+    """Regional host for account-v1, which isn't served by 'sea' (its players go through 'asia')."""
+    region = get_region(platform)
+    return "asia" if region == "sea" else region
+
+
+def get_match_platform(match_id: str) -> str:
+    """
+    Platform a match was played on, read from its ID prefix.
+
+    Example:
+        >>> get_match_platform("EUN1_3456789012")
+        'eun1'
+    """
+    prefix = match_id.split("_", 1)[0].lower()
+    return prefix if prefix in PLATFORM_REGIONS else DEFAULT_PLATFORM
+
+
+def guess_platform(tag: str) -> str:
+    """Best guess of a player's platform from their tagline, for lookups made before it is resolved."""
+    return TAG_PLATFORMS.get(tag.lower(), DEFAULT_PLATFORM)
+
+
+def get_host(routing_value: str) -> str:
+    return f"{routing_value}.api.riotgames.com"
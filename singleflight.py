@@ -0,0 +1,44 @@
+import asyncio
+import logging
+logger = logging.getLogger('discord.singleflight')
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into a single one.
+
+    While a call for a key is in flight, every other caller asking for the same key
+    awaits that call instead of starting its own, and all of them get the same result
+    (or the same exception). Results are shared, so callers must not mutate them.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _forget(self, key, task) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved, in case every caller was cancelled before it arrived.
+            task.exception()
+
+    async def do(self, key, coro_factory):
+        """
+        Returns the result of `coro_factory()`, sharing it with concurrent callers of the same key.
+
+        Args:
+            key: hashable identity of the call (e.g. the URL and its parameters)
+            coro_factory: callable returning the coroutine to run if no call is in flight
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(coro_factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+            logger.debug(f"{self.name}: sharing in-flight call for {key}")
+        # Shielded, so one caller being cancelled doesn't cancel the call for everyone else.
+        return await asyncio.shield(task)
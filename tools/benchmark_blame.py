@@ -0,0 +1,233 @@
+"""
+Offline benchmark for the INT score model and the !blame pipeline.
+
+Generates synthetic match-v5 payloads of realistic size, times every stage of the
+blame pipeline per match and per 1k matches, measures allocations, and compares the
+results against a stored baseline.
+
+Usage (from the repository root):
+    python tools/benchmark_blame.py                   # run and compare against the baseline
+    python tools/benchmark_blame.py --save-baseline   # run and store the results as the new baseline
+    python tools/benchmark_blame.py --matches 5000 --threshold 0.3
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The bot's stores open their files under data/ on import, so run from a scratch directory
+# to keep synthetic scores, matches and registrations out of the repository's data/.
+BENCH_DIR = tempfile.mkdtemp(prefix="marble_bench_")
+os.chdir(BENCH_DIR)
+
+from match_records import MatchRecord
+from match_score_calculator import calculate_int_scores, calculate_int_scores_batch
+from helpers import get_match_int_scores_list
+from int_score_cache import IntScoreCache, int_score_cache
+from cogs.blamer import analyze_losses, find_inters
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+TARGET_PLAYER = "Peafowl"
+PLAYER_POOL = [TARGET_PLAYER, "yoyo15", "vladimus2005", "Dani", "Painite"]
+# Real participants carry ~130 stats and ~120 challenges, most of which the model never reads.
+FILLER_STATS = 150
+FILLER_CHALLENGES = 125
+
+
+def make_participant(rng, name, win, position, team_kills):
+    kills = rng.randint(0, 15)
+    deaths = rng.randint(0, 12)
+    assists = rng.randint(0, 20)
+    participant = {
+        "puuid": f"puuid-{name}-{rng.random():.12f}",
+        "riotIdGameName": name,
+        "riotIdTagline": "EUNE",
+        "win": win,
+        "teamId": 100 if win else 200,
+        "teamPosition": position,
+        "kills": kills,
+        "deaths": deaths,
+        "assists": assists,
+        "visionScore": rng.randint(5, 90),
+        "goldEarned": rng.randint(6000, 18000),
+        "challenges": {
+            "visionScorePerMinute": rng.uniform(0.1, 3.0),
+            "goldPerMinute": rng.uniform(250, 600),
+            "damagePerMinute": rng.uniform(200, 1500),
+            "killParticipation": min(1.0, (kills + assists) / max(team_kills, 1))
+        }
+    }
+    participant["perks"] = {
+        "statPerks": {"defense": 5001, "flex": 5008, "offense": 5005},
+        "styles": [
+            {
+                "description": style,
+                "selections": [{"perk": rng.randint(8000, 9999), "var1": rng.randint(0, 3000), "var2": 0, "var3": 0} for _ in range(slots)],
+                "style": rng.randint(8000, 8400)
+            }
+            for style, slots in (("primaryStyle", 4), ("subStyle", 2))
+        ]
+    }
+    for i in range(FILLER_STATS):
+        participant[f"stat{i}"] = rng.randint(0, 50000)
+    for i in range(FILLER_CHALLENGES):
+        participant["challenges"][f"challenge{i}"] = rng.uniform(0, 100)
+    return participant
+
+
+def make_match(rng, index, pool):
+    """Builds one synthetic match-v5 payload where the pool plays (and loses) on the same team."""
+    participants = []
+    for team_index, win in enumerate((True, False)):
+        names = [f"Random{index}_{team_index}_{i}" for i in range(5)] if win else list(pool)
+        team_kills = rng.randint(10, 45)
+        for name, position in zip(names, POSITIONS):
+            participants.append(make_participant(rng, name, win, position, team_kills))
+    return {
+        "metadata": {"matchId": f"EUN1_{index}", "participants": [p["puuid"] for p in participants]},
+        "info": {
+            "gameDuration": rng.randint(900, 2400),
+            "gameStartTimestamp": 1767225600000 + index * 3600000,
+            "queueId": 420,
+            "participants": participants
+        }
+    }
+
+
+def make_matches(count, seed=42):
+    rng = random.Random(seed)
+    return [make_match(rng, index, PLAYER_POOL) for index in range(count)]
+
+
+def get_stages(matches, cache_dir):
+    """
+    Returns (name, callable) for every pipeline stage, each working on all `matches`.
+    Like in the bot, stages after "MatchRecord" work on match records rather than full payloads.
+    Stages reading the INT score cache run warm, except for "int_score_cache_cold".
+    """
+    payloads = matches
+    matches = [MatchRecord(match) for match in payloads]
+    int_scores_list = get_match_int_scores_list(matches, PLAYER_POOL)
+    cold_cache_path = os.path.join(cache_dir, "cold.jsonl")
+
+    def score_cold():
+        if os.path.exists(cold_cache_path):
+            os.remove(cold_cache_path)
+        return IntScoreCache(cold_cache_path).get_breakdowns(matches)
+
+    return [
+        ("MatchRecord", lambda: [MatchRecord(match) for match in payloads]),
+        ("calculate_int_scores", lambda: [calculate_int_scores(match) for match in matches]),
+        ("calculate_int_scores_batch", lambda: calculate_int_scores_batch(matches)),
+        ("int_score_cache_cold", score_cold),
+        ("int_score_cache_warm", lambda: int_score_cache.get_breakdowns(matches)),
+        ("get_match_int_scores_list", lambda: get_match_int_scores_list(matches, PLAYER_POOL)),
+        ("find_inters", lambda: find_inters(int_scores_list)),
+        ("analyze_losses", lambda: analyze_losses(matches, TARGET_PLAYER)),
+    ]
+
+
+def measure_record_size(matches):
+    """Returns the memory (KB) held per match by its full payload and by its MatchRecord."""
+    tracemalloc.start()
+    payloads = [json.loads(json.dumps(match)) for match in matches]
+    payloads_size, _ = tracemalloc.get_traced_memory()
+    records = [MatchRecord(match) for match in payloads]
+    total_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return payloads_size / len(matches) / 1024, (total_size - payloads_size) / len(records) / 1024
+
+
+def run_benchmark(match_count, repeats):
+    matches = make_matches(match_count)
+    payload_kb = len(json.dumps(matches[0])) / 1024
+    results = {}
+    for name, stage in get_stages(matches, BENCH_DIR):
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            stage()
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+
+        # Allocations are measured on a separate run, tracemalloc slows everything down.
+        tracemalloc.start()
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {
+            "per_match_us": best / match_count * 1e6,
+            "per_1k_ms": best / match_count * 1000 * 1000,
+            "peak_alloc_kb": peak / 1024
+        }
+    return payload_kb, results
+
+
+def compare(results, baseline, threshold):
+    """Returns the stages that got slower than the baseline by more than `threshold`."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        change = result["per_1k_ms"] / previous["per_1k_ms"] - 1
+        result["change"] = change
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the INT score model and the !blame pipeline.")
+    parser.add_argument("--matches", type=int, default=1000, help="number of synthetic matches (default: 1000)")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per stage, the best one is kept (default: 5)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="slowdown flagged as a regression (default: 0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    # The model logs every player it scores, which would dominate the timings.
+    logging.disable(logging.CRITICAL)
+
+    payload_kb, results = run_benchmark(args.matches, args.repeats)
+    payload_memory_kb, record_memory_kb = measure_record_size(make_matches(min(args.matches, 100)))
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf8") as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline.get("results", {}), args.threshold)
+
+    print(f"{args.matches} synthetic matches, ~{payload_kb:.0f} KB each, best of {args.repeats} runs")
+    print(f"In memory: {payload_memory_kb:.0f} KB per full payload, {record_memory_kb:.1f} KB per match record\n")
+    print(f"{'stage':<32}{'per match':>14}{'per 1k':>14}{'peak alloc':>14}{'vs baseline':>14}")
+    for name, result in results.items():
+        change = f"{result['change'] * 100:+.1f}%" if "change" in result else "-"
+        flag = "  <-- REGRESSION" if name in regressions else ""
+        print(
+            f"{name:<32}{result['per_match_us']:>11.1f} us{result['per_1k_ms']:>11.1f} ms"
+            f"{result['peak_alloc_kb']:>11.0f} KB{change:>14}{flag}"
+        )
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf8") as f:
+            stored = {name: {k: v for k, v in result.items() if k != "change"} for name, result in results.items()}
+            json.dump({"matches": args.matches, "results": stored}, f, indent=4)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+    elif not baseline:
+        print("\nNo baseline stored yet, run with --save-baseline to create one.")
+
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) regressed by more than {args.threshold * 100:.0f}%.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()